@@ -0,0 +1,205 @@
+"""Prueba de carga de extremo a extremo contra la API falsa.
+
+Simula ``N`` entradas por el mismo camino que ``GasolinerasCoordinator``.
+Cada entrada hace una primera carga (``descargar_tabla`` en un executor de
+hilos); si falla cuenta como arranque fallido, porque ese reintento lo hace
+Home Assistant con la configuración y no el planificador. Después recorre
+``--ciclos`` sondeos como ``_async_sondear``: espera hasta
+``PlanificadorPublicacion.proximo_sondeo``, consulta la ``Fecha`` de
+publicación y refresca cuando ``registrar_sondeo`` lo pide; los refrescos
+fallidos se anotan con ``sin_cambio`` como el ``UpdateFailed`` del
+coordinador. El reloj del planificador es simulado y las esperas reales se
+escalan con ``--escala-tiempo`` para que la prueba dure segundos y no horas.
+
+La API falsa publica siempre la misma ``Fecha``, así que tras la primera carga
+solo se vuelve a descargar por sondeos fallidos o por caducidad: la prueba
+mide la carga que generan los sondeos y los reintentos, no la de nuevas
+publicaciones.
+
+Uso::
+
+    python -m benchmarks.carga --entradas 20 --latencia 1 --tasa-error 0.2
+    python -m benchmarks.carga --entradas 5 --goteo 0.5 --modo provincia
+    python -m benchmarks.carga --url http://127.0.0.1:8089/ServiciosRESTCarburantes/PreciosCarburantes
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .servidor_falso import ConfiguracionServidor, ServidorFalso
+
+
+def _cargar_integracion(url_base: str):
+    """Importa los módulos de la integración apuntando a ``url_base``."""
+    os.environ["GEOPORTAL_GASOLINERAS_API_BASE"] = url_base
+    modulos = {}
+    for nombre in ("const", "api", "descarga", "planificador", "telemetria"):
+        modulo = importlib.import_module(f"custom_components.geoportal_gasolineras.{nombre}")
+        # Por si ya estaban importados con otra URL
+        modulos[nombre] = importlib.reload(modulo)
+    return modulos
+
+
+async def _entrada(integracion, executor, modo: str, provincia_id: str, clave: str, args) -> dict:
+    """Carga una entrada y la hace pasar por ``args.ciclos`` sondeos del planificador."""
+    requests = integracion["api"].requests
+    get_fecha_publicacion = integracion["api"].get_fecha_publicacion
+    descargar_tabla = integracion["descarga"].descargar_tabla
+    MetricasRefresco = integracion["telemetria"].MetricasRefresco
+    planificador = integracion["planificador"].PlanificadorPublicacion(clave)
+    parsear_fecha = integracion["planificador"].parsear_fecha
+    telemetria = integracion["telemetria"].TelemetriaRefresco(muestras=args.ciclos + 1)
+    loop = asyncio.get_running_loop()
+    resultado = {
+        "sondeos": 0,
+        "sondeos_fallidos": 0,
+        "refrescos": 0,
+        "errores": 0,
+        "timeouts": 0,
+        "esperas": [],
+        "correctos": [],
+    }
+
+    async def refrescar(instante: datetime) -> bool:
+        """Como ``_async_update_data``: descarga, telemetría y planificador."""
+        metricas = {}
+        inicio = time.perf_counter()
+        resultado["refrescos"] += 1
+        try:
+            await loop.run_in_executor(
+                executor, descargar_tabla, provincia_id if modo == "provincia" else None, metricas
+            )
+        except Exception as err:  # noqa: BLE001 - el coordinador convierte cualquier fallo en UpdateFailed
+            resultado["errores"] += 1
+            resultado["timeouts"] += isinstance(err, requests.Timeout)
+            telemetria.registrar_refresco(
+                MetricasRefresco(instante, total_s=time.perf_counter() - inicio, error=str(err), **metricas)
+            )
+            planificador.sin_cambio()
+            return False
+        telemetria.registrar_refresco(
+            MetricasRefresco(instante, total_s=time.perf_counter() - inicio, **metricas)
+        )
+        resultado["correctos"].append(telemetria.ultimo)
+        planificador.registrar(parsear_fecha(metricas.get("fecha")), instante)
+        return True
+
+    # Primera carga: si falla, el coordinador no reintenta; lo hace Home Assistant con la configuración
+    reloj = datetime.now(timezone.utc)
+    resultado["ok"] = await refrescar(reloj)
+    if not resultado["ok"]:
+        return resultado
+
+    # Ciclo de _async_sondear con un reloj simulado
+    for _ in range(args.ciclos):
+        cuando = planificador.proximo_sondeo(reloj)
+        espera = (cuando - reloj).total_seconds()
+        resultado["esperas"].append(espera)
+        await asyncio.sleep(espera * args.escala_tiempo)
+        reloj = cuando
+
+        resultado["sondeos"] += 1
+        try:
+            fecha = parsear_fecha(await loop.run_in_executor(executor, get_fecha_publicacion))
+        except Exception as err:  # noqa: BLE001 - como en _async_sondear
+            resultado["timeouts"] += isinstance(err, requests.Timeout)
+            fecha = None
+        resultado["sondeos_fallidos"] += fecha is None
+        if planificador.registrar_sondeo(fecha, reloj):
+            await refrescar(reloj)
+
+    return resultado
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+async def _ejecutar(args) -> list:
+    integracion = _cargar_integracion(args.url)
+    with ThreadPoolExecutor(max_workers=args.entradas) as executor:
+        return await asyncio.gather(
+            *(
+                _entrada(integracion, executor, args.modo, f"{(i % 52) + 1:02d}", f"carga_{i}", args)
+                for i in range(args.entradas)
+            )
+        )
+
+
+def ejecutar(args) -> dict:
+    """Lanza las entradas en paralelo y resume los resultados."""
+    resultados = asyncio.run(_ejecutar(args))
+
+    arrancadas = [r for r in resultados if r["ok"]]
+    resumen = {
+        "entradas": args.entradas,
+        # La primera carga fallida la reintenta Home Assistant, no el planificador
+        "arranques_fallidos": len(resultados) - len(arrancadas),
+        "sondeos": sum(r["sondeos"] for r in resultados),
+        "sondeos_fallidos": sum(r["sondeos_fallidos"] for r in resultados),
+        "refrescos": sum(r["refrescos"] for r in resultados),
+        "refrescos_fallidos": sum(r["errores"] for r in resultados),
+        "timeouts": sum(r["timeouts"] for r in resultados),
+    }
+    correctos = [m for r in resultados for m in r["correctos"]]
+    if correctos:
+        # Latencia de los refrescos correctos, medida como en la telemetría del coordinador
+        for campo in ("total_s", "http_s", "parseo_s", "normalizacion_s"):
+            valores = [getattr(m, campo) for m in correctos]
+            resumen[f"{campo}_p50"] = round(statistics.median(valores), 3)
+            resumen[f"{campo}_p95"] = round(_percentil(valores, 0.95), 3)
+    esperas = [espera for r in resultados for espera in r["esperas"]]
+    if esperas:
+        # En tiempo simulado, sin escalar
+        resumen["espera_sondeo_min_p50"] = round(statistics.median(esperas) / 60, 1)
+        resumen["espera_sondeo_min_max"] = round(max(esperas) / 60, 1)
+    return resumen
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga contra la API falsa")
+    parser.add_argument("--url", help="URL base de una API ya arrancada")
+    parser.add_argument("--entradas", type=int, default=10)
+    parser.add_argument("--modo", choices=["todas", "provincia"], default="todas")
+    parser.add_argument("--estaciones", type=int, default=12_000)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    parser.add_argument("--ancho-banda", type=int, default=0, help="bytes/s")
+    parser.add_argument("--tasa-error", type=float, default=0.0)
+    parser.add_argument("--goteo", type=float, default=0.0)
+    parser.add_argument("--ciclos", type=int, default=8, help="sondeos tras la primera carga")
+    parser.add_argument(
+        "--escala-tiempo",
+        type=float,
+        default=0.001,
+        help="factor aplicado a las esperas del planificador (0.001: 1 h = 3,6 s)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.url:
+        print(ejecutar(args))
+        return 0
+
+    config = ConfiguracionServidor(
+        latencia=args.latencia,
+        ancho_banda=args.ancho_banda,
+        tasa_error=args.tasa_error,
+        goteo=args.goteo,
+    )
+    with ServidorFalso(config, estaciones=args.estaciones) as servidor:
+        args.url = servidor.url_base
+        print(ejecutar(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
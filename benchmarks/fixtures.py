@@ -0,0 +1,183 @@
+"""Generador de respuestas sintéticas con el formato de la API del Ministerio.
+
+Reproduce los nombres de campo reales de ``ListaEESSPrecio``, los decimales con
+coma y los precios vacíos, de modo que los benchmarks recorren exactamente el
+mismo código que con datos reales.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime
+
+# (ID, nombre, IDCCAA, CCAA, latitud centro, longitud centro)
+PROVINCIAS = [
+    ("01", "ARABA/ÁLAVA", "16", "País Vasco", 42.85, -2.67),
+    ("02", "ALBACETE", "08", "Castilla-La Mancha", 38.99, -1.86),
+    ("03", "ALICANTE", "10", "Comunitat Valenciana", 38.35, -0.48),
+    ("04", "ALMERÍA", "01", "Andalucía", 36.84, -2.46),
+    ("05", "ÁVILA", "07", "Castilla y León", 40.66, -4.70),
+    ("06", "BADAJOZ", "11", "Extremadura", 38.88, -6.97),
+    ("07", "BALEARS (ILLES)", "04", "Balears, Illes", 39.57, 2.65),
+    ("08", "BARCELONA", "09", "Cataluña", 41.39, 2.17),
+    ("09", "BURGOS", "07", "Castilla y León", 42.34, -3.70),
+    ("10", "CÁCERES", "11", "Extremadura", 39.47, -6.37),
+    ("11", "CÁDIZ", "01", "Andalucía", 36.53, -6.29),
+    ("12", "CASTELLÓN / CASTELLÓ", "10", "Comunitat Valenciana", 39.99, -0.05),
+    ("13", "CIUDAD REAL", "08", "Castilla-La Mancha", 38.99, -3.93),
+    ("14", "CÓRDOBA", "01", "Andalucía", 37.88, -4.78),
+    ("15", "CORUÑA (A)", "12", "Galicia", 43.36, -8.41),
+    ("16", "CUENCA", "08", "Castilla-La Mancha", 40.07, -2.13),
+    ("17", "GIRONA", "09", "Cataluña", 41.98, 2.82),
+    ("18", "GRANADA", "01", "Andalucía", 37.18, -3.60),
+    ("19", "GUADALAJARA", "08", "Castilla-La Mancha", 40.63, -3.17),
+    ("20", "GIPUZKOA", "16", "País Vasco", 43.32, -1.98),
+    ("21", "HUELVA", "01", "Andalucía", 37.26, -6.94),
+    ("22", "HUESCA", "02", "Aragón", 42.14, -0.41),
+    ("23", "JAÉN", "01", "Andalucía", 37.77, -3.79),
+    ("24", "LEÓN", "07", "Castilla y León", 42.60, -5.57),
+    ("25", "LLEIDA", "09", "Cataluña", 41.62, 0.62),
+    ("26", "RIOJA (LA)", "17", "Rioja, La", 42.47, -2.45),
+    ("27", "LUGO", "12", "Galicia", 43.01, -7.56),
+    ("28", "MADRID", "13", "Madrid, Comunidad de", 40.42, -3.70),
+    ("29", "MÁLAGA", "01", "Andalucía", 36.72, -4.42),
+    ("30", "MURCIA", "14", "Murcia, Región de", 37.99, -1.13),
+    ("31", "NAVARRA", "15", "Navarra, Comunidad Foral de", 42.82, -1.64),
+    ("32", "OURENSE", "12", "Galicia", 42.34, -7.86),
+    ("33", "ASTURIAS", "03", "Asturias, Principado de", 43.36, -5.85),
+    ("34", "PALENCIA", "07", "Castilla y León", 42.01, -4.53),
+    ("35", "PALMAS (LAS)", "05", "Canarias", 28.12, -15.43),
+    ("36", "PONTEVEDRA", "12", "Galicia", 42.43, -8.64),
+    ("37", "SALAMANCA", "07", "Castilla y León", 40.97, -5.66),
+    ("38", "SANTA CRUZ DE TENERIFE", "05", "Canarias", 28.46, -16.25),
+    ("39", "CANTABRIA", "06", "Cantabria", 43.46, -3.80),
+    ("40", "SEGOVIA", "07", "Castilla y León", 40.95, -4.12),
+    ("41", "SEVILLA", "01", "Andalucía", 37.39, -5.98),
+    ("42", "SORIA", "07", "Castilla y León", 41.76, -2.46),
+    ("43", "TARRAGONA", "09", "Cataluña", 41.12, 1.25),
+    ("44", "TERUEL", "02", "Aragón", 40.34, -1.11),
+    ("45", "TOLEDO", "08", "Castilla-La Mancha", 39.86, -4.02),
+    ("46", "VALENCIA / VALÈNCIA", "10", "Comunitat Valenciana", 39.47, -0.38),
+    ("47", "VALLADOLID", "07", "Castilla y León", 41.65, -4.72),
+    ("48", "BIZKAIA", "16", "País Vasco", 43.26, -2.93),
+    ("49", "ZAMORA", "07", "Castilla y León", 41.50, -5.75),
+    ("50", "ZARAGOZA", "02", "Aragón", 41.65, -0.89),
+    ("51", "CEUTA", "18", "Ceuta", 35.89, -5.32),
+    ("52", "MELILLA", "19", "Melilla", 35.29, -2.94),
+]
+
+ROTULOS = [
+    "REPSOL", "CEPSA", "GALP", "BP", "SHELL", "PLENOIL", "BALLENOIL",
+    "PETROPRIX", "CARREFOUR", "ALCAMPO", "AVIA", "DISA", "MEROIL", "PETRONOR",
+    "ESCLATOIL", "BONÀREA", "Q8", "TAMOIL", "GASEXPRESS", "E.S. LA VENTA",
+]
+
+LOCALIDADES = [
+    "ALCALÁ DE HENARES", "ALCALÁ LA REAL", "ALCALÁ DEL RÍO", "ALCALÁ DE GUADAÍRA",
+    "ALCOBENDAS", "ALCORCÓN", "ALGECIRAS", "ALMENDRALEJO", "ARANDA DE DUERO",
+    "BENIDORM", "CARTAGENA", "DOS HERMANAS", "ELCHE", "ÉCIJA", "FUENLABRADA",
+    "GANDIA", "GETAFE", "GIJÓN", "JEREZ DE LA FRONTERA", "LEGANÉS", "LINARES",
+    "LORCA", "MARBELLA", "MÉRIDA", "MÓSTOLES", "MOTRIL", "PONFERRADA", "REUS",
+    "SABADELL", "SAN SEBASTIÁN DE LOS REYES", "TALAVERA DE LA REINA",
+    "TERRASSA", "TORREJÓN DE ARDOZ", "TORREVIEJA", "UTRERA", "VIGO", "VITORIA-GASTEIZ",
+]
+
+VIAS = ["CALLE", "AVENIDA", "CARRETERA", "PLAZA", "POLÍGONO", "CAMINO"]
+
+CAMPOS_PRECIO = [
+    "Precio Biodiesel",
+    "Precio Bioetanol",
+    "Precio Gas Natural Comprimido",
+    "Precio Gas Natural Licuado",
+    "Precio Gases licuados del petróleo",
+    "Precio Gasoleo A",
+    "Precio Gasoleo B",
+    "Precio Gasoleo Premium",
+    "Precio Gasolina 95 E10",
+    "Precio Gasolina 95 E5",
+    "Precio Gasolina 95 E5 Premium",
+    "Precio Gasolina 98 E10",
+    "Precio Gasolina 98 E5",
+    "Precio Hidrogeno",
+]
+
+# Precio base y probabilidad de que la estación venda el producto
+_PRECIOS_BASE = {
+    "Precio Gasoleo A": (1.42, 0.97),
+    "Precio Gasoleo Premium": (1.52, 0.70),
+    "Precio Gasolina 95 E5": (1.55, 0.95),
+    "Precio Gasolina 98 E5": (1.69, 0.55),
+    "Precio Gasoleo B": (1.12, 0.25),
+    "Precio Gases licuados del petróleo": (0.99, 0.10),
+}
+
+
+def _coma(valor: float, decimales: int) -> str:
+    """Formatea un número con coma decimal, como lo devuelve la API."""
+    return f"{valor:.{decimales}f}".replace(".", ",")
+
+
+def generar_provincias() -> list:
+    """Devuelve el listado de provincias con el formato de ``Listados/Provincias``."""
+    return [
+        {"IDPovincia": id_prov, "IDCCAA": id_ccaa, "Provincia": nombre, "CCAA": ccaa}
+        for id_prov, nombre, id_ccaa, ccaa, _, _ in PROVINCIAS
+    ]
+
+
+def generar_estacion(rng: random.Random, indice: int, prob_sin_precio: float = 0.0) -> dict:
+    """Genera una estación con los campos y formatos reales de la API."""
+    id_prov, provincia, id_ccaa, _, lat_c, lon_c = rng.choice(PROVINCIAS)
+    localidad = rng.choice(LOCALIDADES) if rng.random() < 0.6 else provincia
+    lat = lat_c + rng.gauss(0, 0.35)
+    lon = lon_c + rng.gauss(0, 0.45)
+
+    estacion = {
+        "C.P.": f"{id_prov}{rng.randint(0, 999):03d}",
+        "Dirección": f"{rng.choice(VIAS)} {rng.choice(LOCALIDADES)}, {rng.randint(1, 250)}",
+        "Horario": "L-D: 24H" if rng.random() < 0.4 else "L-S: 07:00-22:00",
+        "Latitud": _coma(lat, 6),
+        "Localidad": localidad,
+        "Longitud (WGS84)": _coma(lon, 6),
+        "Margen": rng.choice(["D", "I", "N"]),
+        "Municipio": localidad.title(),
+        "Provincia": provincia,
+        "Remisión": rng.choice(["dm", "OM"]),
+        "Rótulo": rng.choice(ROTULOS),
+        "Tipo Venta": "P",
+        "% BioEtanol": "0,0",
+        "% Éster metílico": "0,0",
+        "IDEESS": str(1000 + indice),
+        "IDMunicipio": str(rng.randint(1, 8200)),
+        "IDProvincia": id_prov,
+        "IDCCAA": id_ccaa,
+    }
+    for campo in CAMPOS_PRECIO:
+        base = _PRECIOS_BASE.get(campo)
+        if base is None or rng.random() > base[1] or rng.random() < prob_sin_precio:
+            estacion[campo] = ""
+        else:
+            estacion[campo] = _coma(base[0] + rng.uniform(-0.12, 0.12), 3)
+    return estacion
+
+
+def generar_lista_eess_precio(
+    n: int,
+    semilla: int = 0,
+    prob_sin_precio: float = 0.05,
+    fecha: datetime | None = None,
+) -> dict:
+    """Genera una respuesta completa de ``EstacionesTerrestres`` con ``n`` estaciones.
+
+    La generación es determinista para una misma ``semilla``.
+    """
+    rng = random.Random(semilla)
+    fecha = fecha or datetime(2026, 1, 1, 10, 0, 0)
+    return {
+        "Fecha": fecha.strftime("%d/%m/%Y %H:%M:%S"),
+        "ListaEESSPrecio": [
+            generar_estacion(rng, i, prob_sin_precio) for i in range(n)
+        ],
+        "Nota": "Archivo de todas las estaciones de servicio. Datos sintéticos.",
+        "ResultadoConsulta": "OK",
+    }
@@ -0,0 +1,236 @@
+"""Suite de benchmarks de los caminos calientes de la integración.
+
+Uso (desde la raíz del repositorio)::
+
+    python -m benchmarks.run                      # ejecutar e imprimir resultados
+    python -m benchmarks.run --guardar            # guardar como baseline
+    python -m benchmarks.run --comparar           # comparar contra el baseline
+
+La comparación devuelve código de salida 1 si algún caso empeora más de la
+tolerancia indicada, de forma que puede usarse para detectar regresiones.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from custom_components.geoportal_gasolineras import api
+from custom_components.geoportal_gasolineras.busqueda import IndiceBusqueda, vista_previa
+from custom_components.geoportal_gasolineras.datos import TablaEstaciones
+from custom_components.geoportal_gasolineras.sensor import (
+    GasolineraBarataSensor,
+    GasolineraIndividualSensor,
+    GasolinerasCercanasSensor,
+    ListaGasolinerasBaratasSensor,
+    TotalEstacionesSensor,
+)
+from custom_components.geoportal_gasolineras.telemetria import TelemetriaRefresco
+
+from .fixtures import generar_lista_eess_precio
+
+BASELINE = Path(__file__).with_name("baseline.json")
+TAMANOS = (12_000, 50_000, 200_000)
+PRODUCTO = "Gasolina 95 E5"
+# Provincia de referencia para el modo provincia (Madrid)
+PROVINCIA_ID = "28"
+# Centro y radio de referencia para el modo coordenadas (Puerta del Sol)
+CENTRO = (40.4168, -3.7038)
+RADIO_KM = 25
+
+
+class _RespuestaFalsa:
+    """Respuesta HTTP en memoria con la misma interfaz que ``requests.Response``."""
+
+    def __init__(self, contenido: bytes):
+        self.content = contenido
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def _medir(funcion, repeticiones: int) -> dict:
+    """Ejecuta ``funcion`` varias veces y devuelve tiempos y pico de memoria."""
+    tiempos = []
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "min_ms": round(min(tiempos) * 1000, 3),
+        "mediana_ms": round(statistics.median(tiempos) * 1000, 3),
+        "pico_kib": round(pico / 1024, 1),
+    }
+
+
+def _sensores_provincia(coordinator) -> list:
+    """Entidades que crea una entrada en modo provincia."""
+    sensores = [
+        TotalEstacionesSensor(coordinator, "Madrid"),
+        GasolineraBarataSensor(coordinator, "Madrid", PRODUCTO),
+        ListaGasolinerasBaratasSensor(coordinator, "Madrid", PRODUCTO),
+    ]
+    sensores.extend(
+        GasolineraIndividualSensor(coordinator, "Madrid", PRODUCTO, i) for i in range(5)
+    )
+    return sensores
+
+
+def _casos(n: int) -> dict:
+    """Construye los casos a medir para un tamaño de fixture."""
+    respuesta = generar_lista_eess_precio(n)
+    contenido = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+    estaciones = respuesta["ListaEESSPrecio"]
+    contenido_provincia = json.dumps(
+        {
+            **respuesta,
+            "ListaEESSPrecio": [e for e in estaciones if e["IDProvincia"] == PROVINCIA_ID],
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    coordinator = SimpleNamespace(
+        data=TablaEstaciones.desde_api(estaciones), telemetria=TelemetriaRefresco()
+    )
+
+    lista = ListaGasolinerasBaratasSensor(coordinator, "Madrid", PRODUCTO)
+    cercanas = GasolinerasCercanasSensor(coordinator, "Madrid", *CENTRO, RADIO_KM, PRODUCTO)
+    sensores = _sensores_provincia(coordinator) + [cercanas]
+    busqueda = IndiceBusqueda(coordinator.data)
+
+    def parseo():
+        with mock.patch.object(api.requests, "get", return_value=_RespuestaFalsa(contenido)):
+            api.get_estaciones_todas()
+
+    def parseo_provincia():
+        with mock.patch.object(api.requests, "get", return_value=_RespuestaFalsa(contenido_provincia)):
+            api.get_estaciones_por_provincia(PROVINCIA_ID)
+
+    def serializar_atributos():
+        json.dumps(lista.extra_state_attributes)
+        json.dumps(cercanas.extra_state_attributes)
+
+    def refresco_completo():
+        with mock.patch.object(api.requests, "get", return_value=_RespuestaFalsa(contenido)):
+            coordinator.data = TablaEstaciones.desde_api(api.get_estaciones_todas())
+        for sensor in sensores:
+            sensor.native_value
+            json.dumps(sensor.extra_state_attributes)
+
+    return {
+        "parseo_get_estaciones": parseo,
+        "parseo_get_estaciones_provincia": parseo_provincia,
+        "normalizacion": lambda: TablaEstaciones.desde_api(estaciones),
+        # Coste de devolver la tabla desde el proceso trabajador
+        "tabla_a_bytes_y_vuelta": lambda: TablaEstaciones.desde_bytes(coordinator.data.a_bytes()),
+        "estaciones_validas": lista._get_estaciones_validas,
+        "gasolineras_en_radio": cercanas._get_gasolineras_en_radio,
+        "extra_state_attributes": serializar_atributos,
+        "refresco_completo": refresco_completo,
+        # Flujo de configuración: índice de búsqueda, consulta y vista previa
+        "indice_busqueda": lambda: IndiceBusqueda(coordinator.data),
+        "buscar_localidad": lambda: busqueda.buscar("alcal"),
+        "vista_previa_radio": lambda: vista_previa(coordinator.data, *CENTRO, RADIO_KM, PRODUCTO),
+    }
+
+
+def ejecutar(tamanos, repeticiones: int) -> dict:
+    """Ejecuta todos los casos para cada tamaño y devuelve los resultados."""
+    resultados = {}
+    for n in tamanos:
+        for nombre, funcion in _casos(n).items():
+            clave = f"{nombre}[{n}]"
+            resultados[clave] = _medir(funcion, repeticiones)
+            print(f"{clave:<40} {resultados[clave]}")
+    return resultados
+
+
+def _entorno() -> dict:
+    """Máquina y versión de Python en las que se han medido los resultados."""
+    return {
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "procesador": platform.processor() or platform.machine(),
+        "sistema": platform.platform(),
+    }
+
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float) -> list:
+    """Devuelve los casos cuya mediana empeora más de ``tolerancia`` respecto al baseline."""
+    regresiones = []
+    for clave, actual in resultados.items():
+        previo = baseline.get(clave)
+        if not previo:
+            continue
+        if actual["mediana_ms"] > previo["mediana_ms"] * tolerancia:
+            regresiones.append(
+                f"{clave}: {previo['mediana_ms']} ms -> {actual['mediana_ms']} ms"
+            )
+    return regresiones
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS))
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--guardar", action="store_true", help="guardar como baseline")
+    parser.add_argument("--comparar", action="store_true", help="comparar con el baseline")
+    parser.add_argument("--tolerancia", type=float, default=1.25)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    args = parser.parse_args(argv)
+
+    # El baseline depende de la máquina, así que no se versiona: hay que generarlo antes
+    if args.comparar and not args.guardar and not args.baseline.exists():
+        print(
+            f"No existe el baseline {args.baseline}; genéralo en esta máquina con "
+            "'python -m benchmarks.run --guardar' antes de comparar",
+            file=sys.stderr,
+        )
+        return 2
+
+    resultados = ejecutar(args.tamanos, args.repeticiones)
+
+    if args.guardar:
+        baseline = {"_entorno": _entorno(), **resultados}
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline guardado en {args.baseline}")
+
+    if args.comparar:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("_entorno") != _entorno():
+            print(
+                f"AVISO: el baseline se midió en otro entorno ({baseline.get('_entorno')}); "
+                "las diferencias pueden no ser regresiones",
+                file=sys.stderr,
+            )
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        for linea in regresiones:
+            print(f"REGRESIÓN {linea}")
+        if regresiones:
+            return 1
+        print("Sin regresiones respecto al baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Servidor local que imita la API REST de carburantes del Ministerio.
+
+Implementa ``Listados/Provincias``, ``EstacionesTerrestres`` y
+``EstacionesTerrestres/FiltroProvincia/<id>`` a partir de las fixtures
+sintéticas, con latencia, límite de ancho de banda, tasa de errores y
+respuestas "por goteo" configurables.
+
+Para apuntar la integración a este servidor basta con exportar, antes de
+arrancar Home Assistant::
+
+    GEOPORTAL_GASOLINERAS_API_BASE=http://127.0.0.1:8089/ServiciosRESTCarburantes/PreciosCarburantes
+
+Uso::
+
+    python -m benchmarks.servidor_falso --estaciones 12000 --latencia 0.5 --tasa-error 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fixtures import generar_lista_eess_precio, generar_provincias
+
+PREFIJO = "/ServiciosRESTCarburantes/PreciosCarburantes"
+
+
+@dataclass
+class ConfiguracionServidor:
+    """Comportamiento simulado del servidor."""
+
+    latencia: float = 0.0  # segundos antes de empezar a responder
+    ancho_banda: int = 0  # bytes por segundo, 0 = sin límite
+    tasa_error: float = 0.0  # probabilidad de responder 503
+    goteo: float = 0.0  # segundos de pausa entre fragmentos
+    fragmento: int = 16 * 1024  # tamaño de cada fragmento enviado
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    """Atiende las rutas de la API con los datos precalculados del servidor."""
+
+    server: "_Servidor"
+
+    def do_GET(self):
+        config = self.server.config
+        ruta = self.path.split("?", 1)[0]
+
+        if not ruta.startswith(PREFIJO):
+            self.send_error(404)
+            return
+        ruta = ruta[len(PREFIJO):].rstrip("/")
+
+        if ruta == "/Listados/Provincias":
+            cuerpo = self.server.provincias
+        elif ruta == "/EstacionesTerrestres":
+            cuerpo = self.server.todas
+        elif ruta.startswith("/EstacionesTerrestres/FiltroProvincia/"):
+            id_provincia = ruta.rsplit("/", 1)[-1].zfill(2)
+            # Como la API real, una provincia sin estaciones devuelve una lista vacía
+            cuerpo = self.server.por_provincia.get(id_provincia, self.server.vacia)
+        else:
+            self.send_error(404)
+            return
+
+        if config.latencia:
+            time.sleep(config.latencia)
+
+        if config.tasa_error and random.random() < config.tasa_error:
+            self.send_error(503, "Servicio no disponible (simulado)")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self._enviar(cuerpo, config)
+
+    def _enviar(self, cuerpo: bytes, config: ConfiguracionServidor):
+        """Envía el cuerpo por fragmentos respetando ancho de banda y goteo."""
+        if not config.ancho_banda and not config.goteo:
+            self.wfile.write(cuerpo)
+            return
+
+        pausa = config.goteo
+        if config.ancho_banda:
+            pausa = max(pausa, config.fragmento / config.ancho_banda)
+
+        try:
+            for inicio in range(0, len(cuerpo), config.fragmento):
+                self.wfile.write(cuerpo[inicio:inicio + config.fragmento])
+                self.wfile.flush()
+                time.sleep(pausa)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente ha abandonado (por ejemplo, por timeout)
+            pass
+
+    def log_message(self, format, *args):
+        return
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, direccion, config, provincias, todas, por_provincia, vacia):
+        super().__init__(direccion, _Manejador)
+        self.config = config
+        self.provincias = provincias
+        self.todas = todas
+        self.por_provincia = por_provincia
+        self.vacia = vacia
+
+
+class ServidorFalso:
+    """Servidor de la API falsa ejecutándose en un hilo en segundo plano."""
+
+    def __init__(
+        self,
+        config: ConfiguracionServidor | None = None,
+        estaciones: int = 12_000,
+        host: str = "127.0.0.1",
+        puerto: int = 0,
+        semilla: int = 0,
+    ):
+        self.config = config or ConfiguracionServidor()
+        respuesta = generar_lista_eess_precio(estaciones, semilla=semilla)
+
+        por_provincia = {}
+        for estacion in respuesta["ListaEESSPrecio"]:
+            por_provincia.setdefault(estacion["IDProvincia"], []).append(estacion)
+
+        self._servidor = _Servidor(
+            (host, puerto),
+            self.config,
+            provincias=_a_json(generar_provincias()),
+            todas=_a_json(respuesta),
+            por_provincia={
+                id_provincia: _a_json({**respuesta, "ListaEESSPrecio": lista})
+                for id_provincia, lista in por_provincia.items()
+            },
+            vacia=_a_json({**respuesta, "ListaEESSPrecio": []}),
+        )
+        self._hilo: threading.Thread | None = None
+
+    @property
+    def url_base(self) -> str:
+        """Valor para ``GEOPORTAL_GASOLINERAS_API_BASE``."""
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}{PREFIJO}"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        if self._hilo:
+            self._hilo.join()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+def _a_json(datos) -> bytes:
+    return json.dumps(datos, ensure_ascii=False).encode("utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API falsa de carburantes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8089)
+    parser.add_argument("--estaciones", type=int, default=12_000)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    parser.add_argument("--ancho-banda", type=int, default=0, help="bytes/s")
+    parser.add_argument("--tasa-error", type=float, default=0.0)
+    parser.add_argument("--goteo", type=float, default=0.0, help="segundos entre fragmentos")
+    args = parser.parse_args(argv)
+
+    config = ConfiguracionServidor(
+        latencia=args.latencia,
+        ancho_banda=args.ancho_banda,
+        tasa_error=args.tasa_error,
+        goteo=args.goteo,
+    )
+    servidor = ServidorFalso(config, args.estaciones, args.host, args.puerto)
+    print(f"API falsa escuchando en {servidor.url_base}")
+    try:
+        servidor._servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor._servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
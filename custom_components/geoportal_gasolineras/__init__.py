@@ -1,19 +1,28 @@
 """Integración Geoportal Gasolineras - Inicialización."""
 
+from __future__ import annotations
+
 import logging
-from homeassistant.core import HomeAssistant
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.exceptions import ConfigEntryNotReady
+from typing import TYPE_CHECKING
 
 from .const import DOMAIN
 from .api import get_estaciones_por_provincia
 
+# Home Assistant se importa solo donde se usa: el proceso trabajador
+# (``descarga.py``) también ejecuta este módulo al arrancar y no lo necesita.
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Configuración inicial del componente."""
+    from .perfilado import async_registrar_servicios
+
     _LOGGER.debug("Inicializando integración Geoportal Gasolineras (setup base)")
+    async_registrar_servicios(hass)
     return True
 
 
@@ -21,8 +30,11 @@ async def async_setup(hass: HomeAssistant, config: dict):
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Configuración cuando se añade desde la UI."""
+    from homeassistant.exceptions import ConfigEntryNotReady
+
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = entry.data
+    # El coordinador lo guarda la plataforma de sensores al crearlo
+    hass.data[DOMAIN][entry.entry_id] = {"config": entry.data, "coordinator": None}
 
     # Log para debugging
     _LOGGER.info(f"Configurando entrada: {entry.data}")
@@ -48,8 +60,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             raise ConfigEntryNotReady(f"Fallo al conectar con la API: {err}") from err
     # Reenviar a la plataforma de sensores
     await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
+    # Recargar la entrada cuando cambian sus opciones
+    entry.async_on_unload(entry.add_update_listener(_async_recargar))
     return True
 
+async def _async_recargar(hass: HomeAssistant, entry: ConfigEntry):
+    """Recarga la entrada tras cambiar sus opciones."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Limpieza al eliminar la integración."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, ["sensor"])
@@ -1,10 +1,27 @@
 """Cliente API para obtener datos del Ministerio de Energía."""
+import json
 import logging
+import time
 
 import requests
 _LOGGER = logging.getLogger(__name__)
 
-from .const import PROVINCIAS_ENDPOINT, ESTACIONES_ENDPOINT,TODAS_GASOLINERAS_ENDPOINT
+from .const import PROVINCIAS_ENDPOINT, ESTACIONES_ENDPOINT,TODAS_GASOLINERAS_ENDPOINT, PROVINCIA_SONDEO
+
+def _descargar_json(url: str, timeout: int, metricas: dict | None = None):
+    """Descarga y parsea un JSON, anotando bytes y tiempos en ``metricas`` si se indica."""
+    inicio = time.perf_counter()
+    response = requests.get(url, timeout=timeout, verify=False)
+    response.raise_for_status()
+    contenido = response.content
+    fin_http = time.perf_counter()
+    data = json.loads(contenido)
+
+    if metricas is not None:
+        metricas["descarga_bytes"] = len(contenido)
+        metricas["http_s"] = fin_http - inicio
+        metricas["parseo_s"] = time.perf_counter() - fin_http
+    return data
 
 def get_provincias():
     """Devuelve el listado de provincias."""
@@ -13,32 +30,38 @@ def get_provincias():
     response.raise_for_status()
     return response.json()
 
-def get_estaciones_por_provincia(id_provincia: str) -> list:
+def get_estaciones_por_provincia(id_provincia: str, metricas: dict | None = None) -> list:
     """Devuelve todas las estaciones de servicio de una provincia."""
     url = f"{ESTACIONES_ENDPOINT}{id_provincia}"
     _LOGGER.debug(f"Obteniendo estaciones de: {url}")
 
     try:
-        response = requests.get(url, timeout=20, verify=False)
-        response.raise_for_status()
-        data = response.json()
+        data = _descargar_json(url, 20, metricas)
 
         # Log the structure for debugging
         _LOGGER.debug(f"Respuesta recibida con keys: {list(data.keys())}")
 
         estaciones = data.get("ListaEESSPrecio", [])
         _LOGGER.info(f"Encontradas {len(estaciones)} estaciones para provincia {id_provincia}")
+        if metricas is not None:
+            metricas["fecha"] = data.get("Fecha")
 
         return estaciones
     except Exception as e:
         _LOGGER.error(f"Error al obtener estaciones: {e}")
         raise
-def get_estaciones_todas():
+def get_estaciones_todas(metricas: dict | None = None):
     """Obtiene todas las estaciones de servicio de España."""
     _LOGGER.debug(f"Obteniendo todas las estaciones de: {TODAS_GASOLINERAS_ENDPOINT}")
-    response = requests.get(TODAS_GASOLINERAS_ENDPOINT, timeout=30, verify=False)
-    response.raise_for_status()
-    data = response.json()
+    data = _descargar_json(TODAS_GASOLINERAS_ENDPOINT, 30, metricas)
     estaciones = data.get("ListaEESSPrecio", [])
     _LOGGER.info(f"Encontradas {len(estaciones)} estaciones en total")
-    return estaciones
\ No newline at end of file
+    if metricas is not None:
+        metricas["fecha"] = data.get("Fecha")
+    return estaciones
+
+def get_fecha_publicacion():
+    """Devuelve el campo "Fecha" de la última publicación con una consulta ligera."""
+    url = f"{ESTACIONES_ENDPOINT}{PROVINCIA_SONDEO}"
+    _LOGGER.debug(f"Sondeando fecha de publicación en: {url}")
+    return _descargar_json(url, 15).get("Fecha")
@@ -0,0 +1,144 @@
+"""Búsqueda de localidades y marcas y vista previa por radio para el flujo de configuración.
+
+No depende de Home Assistant; la instantánea que usa el flujo está en ``instantanea.py``.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from bisect import bisect_left
+
+from .datos import TablaEstaciones, campo_precio
+
+TAMANO_NGRAMA = 3
+SEPARADOR_MARCA = " · "
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes, para comparar "Alcalá" con "ALCALA"."""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _ngramas(texto: str) -> set:
+    return {texto[i:i + TAMANO_NGRAMA] for i in range(len(texto) - TAMANO_NGRAMA + 1)}
+
+
+def _etiqueta(marca: str | None, localidad: str, provincia: str) -> str:
+    """Texto de un término: ``[MARCA · ]LOCALIDAD, PROVINCIA``."""
+    texto = f"{localidad}, {provincia}" if provincia else localidad
+    return f"{marca}{SEPARADOR_MARCA}{texto}" if marca is not None else texto
+
+
+class IndiceBusqueda:
+    """Índice de prefijos y n-gramas sobre localidades y pares marca · localidad.
+
+    Cada término es una localidad de una provincia concreta (hay muchas
+    localidades con el mismo nombre en provincias distintas) o una marca en
+    ella, y apunta a los índices de sus estaciones en la tabla. Una consulta
+    con varias palabras exige que cada una sea prefijo de alguna palabra del
+    término ("rep alcal" encuentra "REPSOL · ALCALÁ DE HENARES, MADRID");
+    si no hay coincidencias por prefijo se buscan subcadenas con n-gramas.
+    """
+
+    def __init__(self, tabla: TablaEstaciones):
+        terminos = {}
+        for i, (nombre, localidad, provincia) in enumerate(
+            zip(tabla.nombres, tabla.localidades, tabla.provincias)
+        ):
+            terminos.setdefault((None, localidad, provincia), []).append(i)
+            terminos.setdefault((nombre, localidad, provincia), []).append(i)
+
+        self.terminos = [_etiqueta(*clave) for clave in terminos]
+        self.estaciones = list(terminos.values())
+        self._marcas = [marca is not None for marca, _, _ in terminos]
+        self._normalizados = [normalizar(t) for t in self.terminos]
+
+        palabras = []
+        self._ngramas = {}
+        for id_termino, texto in enumerate(self._normalizados):
+            palabras.extend((palabra, id_termino) for palabra in set(texto.split()))
+            for ngrama in _ngramas(texto):
+                self._ngramas.setdefault(ngrama, set()).add(id_termino)
+        palabras.sort()
+        self._palabras = [p for p, _ in palabras]
+        self._ids_palabras = [i for _, i in palabras]
+
+    def _por_prefijo(self, prefijo: str) -> set:
+        inicio = bisect_left(self._palabras, prefijo)
+        fin = bisect_left(self._palabras, prefijo + "\uffff", inicio)
+        return set(self._ids_palabras[inicio:fin])
+
+    def _por_subcadena(self, consulta: str) -> set:
+        ngramas = _ngramas(consulta)
+        if not ngramas:
+            return set()
+        candidatos = set.intersection(*(self._ngramas.get(n, set()) for n in ngramas))
+        return {i for i in candidatos if consulta in self._normalizados[i]}
+
+    def buscar(self, consulta: str, limite: int = 20) -> list:
+        """Devuelve hasta ``limite`` pares ``(término, índices de estaciones)``."""
+        consulta = normalizar(consulta).strip()
+        palabras = consulta.split()
+        if not palabras:
+            return []
+
+        ids = set.intersection(*(self._por_prefijo(p) for p in palabras))
+        if not ids:
+            ids = self._por_subcadena(consulta)
+
+        # Primero los que empiezan por la consulta, luego las localidades sobre
+        # las marcas y, por último, los que tienen más estaciones
+        ordenados = sorted(
+            ids,
+            key=lambda i: (
+                not self._normalizados[i].startswith(consulta),
+                self._marcas[i],
+                -len(self.estaciones[i]),
+                self.terminos[i],
+            ),
+        )
+        return [(self.terminos[i], self.estaciones[i]) for i in ordenados[:limite]]
+
+
+def centro(tabla: TablaEstaciones, indices) -> tuple | None:
+    """Centroide de las estaciones indicadas que tienen coordenadas."""
+    puntos = [tabla.coordenadas(i) for i in indices]
+    puntos = [(lat, lon) for lat, lon in puntos if lat is not None and lon is not None]
+    if not puntos:
+        return None
+    return (
+        sum(lat for lat, _ in puntos) / len(puntos),
+        sum(lon for _, lon in puntos) / len(puntos),
+    )
+
+
+def _precio(precio: float) -> str:
+    """Precio con coma decimal, como en los sensores y la API."""
+    return f"{precio:.3f}".replace(".", ",")
+
+
+def vista_previa(tabla: TablaEstaciones, latitud, longitud, radio_km, producto) -> dict:
+    """Número de estaciones, la más barata y la más cercana dentro del radio."""
+    campo = campo_precio(producto)
+    en_radio = tabla.en_radio(latitud, longitud, radio_km)
+
+    con_precio = [(i, d) for i, d in en_radio if tabla.precio(i, campo) is not None]
+    mas_barata = min(con_precio, key=lambda par: tabla.precio(par[0], campo), default=None)
+    mas_cercana = min(en_radio, key=lambda par: par[1], default=None)
+
+    return {
+        "estaciones": len(en_radio),
+        "mas_barata": (
+            f"{tabla.nombres[mas_barata[0]]} - {_precio(tabla.precio(mas_barata[0], campo))} €/L "
+            f"({tabla.localidades[mas_barata[0]]})"
+            if mas_barata
+            else "-"
+        ),
+        "mas_cercana": (
+            f"{tabla.nombres[mas_cercana[0]]} - {mas_cercana[1]:.1f} km "
+            f"({tabla.localidades[mas_cercana[0]]})"
+            if mas_cercana
+            else "-"
+        ),
+    }
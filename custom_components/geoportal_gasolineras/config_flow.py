@@ -3,15 +3,29 @@
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import config_validation as cv
 
+from .busqueda import centro, vista_previa
 from .const import DOMAIN, get_provincias_map
+from .instantanea import async_obtener_instantanea, liberar_instantanea
 
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+# El listado de provincias no cambia: se descarga una vez por arranque
+_provincias_map = None
+
+
+async def _async_provincias_map(hass) -> dict:
+    """Devuelve el mapa {nombre: ID} de provincias, descargándolo solo la primera vez."""
+    global _provincias_map
+    if _provincias_map is None:
+        _provincias_map = await hass.async_add_executor_job(get_provincias_map)
+    return _provincias_map
+
 
 class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Maneja el flujo de configuración de la integración Geoportal Gasolineras."""
@@ -21,6 +35,21 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self):
         """Inicializar el flujo."""
         self.config_data = {}
+        self._consulta = None
+        self._resultados = {}
+        self._tabla = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Opciones de una entrada ya creada."""
+        return GeoportalGasolinerasOptionsFlow(config_entry)
+
+    @callback
+    def async_remove(self) -> None:
+        """Al terminar o abandonar el flujo, suelta la instantánea nacional de la búsqueda."""
+        if self.config_data.get("modo") == "coordenadas":
+            liberar_instantanea()
 
     async def async_step_user(self, user_input=None) -> FlowResult:
         """Primer paso: elegir el modo de configuración."""
@@ -50,7 +79,7 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             try:
-                provincias_map = await self.hass.async_add_executor_job(get_provincias_map)
+                provincias_map = await _async_provincias_map(self.hass)
                 provincia_id = provincias_map[user_input["provincia"]]
             except Exception as err:
                 _LOGGER.exception("Error al obtener provincias: %s", err)
@@ -68,7 +97,7 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     },
                 )
 
-        provincias_map = await self.hass.async_add_executor_job(get_provincias_map)
+        provincias_map = await _async_provincias_map(self.hass)
 
         schema = vol.Schema(
             {
@@ -121,6 +150,13 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             lat = None
             lon = None
 
+            # Si ha escrito una búsqueda, anclar en una localidad o marca encontrada
+            consulta = (user_input.get("buscar") or "").strip()
+            if consulta:
+                self._consulta = consulta
+                self.config_data["radio_km"] = radio
+                return await self.async_step_resultados()
+
             # Si eligió una zona, obtener sus coordenadas
             if zone_entity_id and zone_entity_id != "manual":
                 zone_state = self.hass.states.get(zone_entity_id)
@@ -151,6 +187,10 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 })
                 return await self.async_step_confirmar()
 
+        return self._mostrar_coordenadas(errors)
+
+    def _mostrar_coordenadas(self, errors) -> FlowResult:
+        """Formulario del paso de coordenadas."""
         # Obtener zonas del sistema
         zones = {e.entity_id: e.name for e in self.hass.states.async_all("zone")}
 
@@ -161,7 +201,8 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         schema = vol.Schema(
             {
                 vol.Required("zona", default="manual"): vol.In(zone_options),
-                vol.Required("radio_km", default=25): vol.All(
+                vol.Optional("buscar"): cv.string,
+                vol.Required("radio_km", default=self.config_data.get("radio_km", 25)): vol.All(
                     vol.Coerce(int),
                     vol.Range(min=1, max=100)
                 ),
@@ -178,6 +219,51 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
     # ---------------------------------------------------------------------
+    # 📍 MODO COORDENADAS - PASO 2b: RESULTADOS DE BÚSQUEDA
+    # ---------------------------------------------------------------------
+
+    async def async_step_resultados(self, user_input=None) -> FlowResult:
+        """Elegir una de las localidades o marcas encontradas como centro."""
+        if user_input is not None:
+            termino = user_input["resultado"]
+            lat, lon = centro(self._tabla, self._resultados[termino])
+            self.config_data.update({
+                "latitud": lat,
+                "longitud": lon,
+                "zona_nombre": termino.title(),
+                "zona_entity_id": None,
+            })
+            return await self.async_step_confirmar()
+
+        try:
+            instantanea = await async_obtener_instantanea(self.hass)
+        except Exception as err:
+            _LOGGER.exception("Error al obtener las estaciones para la búsqueda: %s", err)
+            return self._mostrar_coordenadas({"base": "fetch_failed"})
+
+        # Solo se ofrecen resultados con coordenadas para poder usarlos como centro
+        self._tabla = instantanea.tabla
+        self._resultados = {
+            termino: indices
+            for termino, indices in instantanea.busqueda.buscar(self._consulta)
+            if centro(self._tabla, indices) is not None
+        }
+        if not self._resultados:
+            return self._mostrar_coordenadas({"buscar": "no_results"})
+
+        opciones = {
+            termino: f"{termino} ({len(indices)} estaciones)"
+            for termino, indices in self._resultados.items()
+        }
+        schema = vol.Schema({vol.Required("resultado"): vol.In(opciones)})
+
+        return self.async_show_form(
+            step_id="resultados",
+            data_schema=schema,
+            description_placeholders={"step": "2/3", "consulta": self._consulta},
+        )
+
+    # ---------------------------------------------------------------------
     # 📍 MODO COORDENADAS - PASO 3: CONFIRMAR
     # ---------------------------------------------------------------------
 
@@ -190,6 +276,15 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             lon = float(user_input["longitud"])
             radio = int(user_input["radio_km"])
 
+            # Si ha cambiado la zona, volver a mostrar la vista previa actualizada
+            if (lat, lon, radio) != (
+                self.config_data["latitud"],
+                self.config_data["longitud"],
+                self.config_data["radio_km"],
+            ):
+                self.config_data.update({"latitud": lat, "longitud": lon, "radio_km": radio})
+                return await self.async_step_confirmar()
+
             zona_nombre = self.config_data.get("zona_nombre", "Personalizada")
             title = f"Gasolineras - {zona_nombre} ({lat:.3f}, {lon:.3f})"
 
@@ -231,6 +326,40 @@ class GeoportalGasolinerasConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 "lat": f"{lat:.6f}",
                 "lon": f"{lon:.6f}",
                 "radio": radio,
-                "producto": self.config_data["producto"]
+                "producto": self.config_data["producto"],
+                **await self._async_vista_previa(lat, lon, radio),
+            }
+        )
+
+    async def _async_vista_previa(self, lat, lon, radio) -> dict:
+        """Estaciones, la más barata y la más cercana en el radio, según la instantánea en caché."""
+        try:
+            instantanea = await async_obtener_instantanea(self.hass)
+        except Exception as err:
+            _LOGGER.warning("No se pudo calcular la vista previa: %s", err)
+            return {"estaciones": "?", "mas_barata": "-", "mas_cercana": "-"}
+
+        return vista_previa(instantanea.tabla, lat, lon, radio, self.config_data["producto"])
+
+
+class GeoportalGasolinerasOptionsFlow(config_entries.OptionsFlow):
+    """Opciones de rendimiento de una entrada."""
+
+    def __init__(self, config_entry):
+        """Inicializar el flujo de opciones."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        """Activar o desactivar el procesado en un proceso trabajador."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    "proceso_trabajador",
+                    default=self._entry.options.get("proceso_trabajador", False),
+                ): bool,
             }
-        )
\ No newline at end of file
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
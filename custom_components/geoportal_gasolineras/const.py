@@ -1,14 +1,36 @@
 """Constantes para la integración Geoportal Gasolineras."""
 
+import os
+from datetime import timedelta
+
 import requests
 
 
 DOMAIN = "geoportal_gasolineras"
-API_BASE = "https://energia.serviciosmin.gob.es/ServiciosRESTCarburantes/PreciosCarburantes"
+# Se puede redirigir a otro servidor (p. ej. la API falsa de benchmarks/) con
+# la variable de entorno GEOPORTAL_GASOLINERAS_API_BASE.
+API_BASE = os.environ.get(
+    "GEOPORTAL_GASOLINERAS_API_BASE",
+    "https://energia.serviciosmin.gob.es/ServiciosRESTCarburantes/PreciosCarburantes",
+).rstrip("/")
 TODAS_GASOLINERAS_ENDPOINT =  f"{API_BASE}/EstacionesTerrestres/"
 PROVINCIAS_ENDPOINT = f"{API_BASE}/Listados/Provincias/"
 ESTACIONES_ENDPOINT = f"{API_BASE}/EstacionesTerrestres/FiltroProvincia/"
 
+# Provincia pequeña (Ceuta) usada como sondeo ligero del campo "Fecha"
+PROVINCIA_SONDEO = "51"
+
+# Planificación de refrescos según la publicación de datos del Ministerio
+PERIODO_PUBLICACION_INICIAL = timedelta(hours=1)
+PERIODO_PUBLICACION_MINIMO = timedelta(minutes=10)
+PERIODO_PUBLICACION_MAXIMO = timedelta(hours=24)
+MARGEN_PUBLICACION = timedelta(minutes=2)
+ESPERA_MINIMA_SONDEO = timedelta(minutes=5)
+DESFASE_MAXIMO = timedelta(minutes=5)
+# Aunque los sondeos no vean datos nuevos, se descarga todo si los datos tienen
+# más de PERIODO_PUBLICACION_MAXIMO o tras estos sondeos fallidos seguidos
+SONDEOS_FALLIDOS_MAXIMOS = 3
+
 
 
 def get_provincias_map() -> dict:
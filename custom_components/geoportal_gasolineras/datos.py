@@ -0,0 +1,347 @@
+"""Normalización de los datos de la API en una tabla compacta por columnas."""
+
+from __future__ import annotations
+
+import struct
+from array import array
+from math import asin, atan2, cos, degrees, floor, isnan, pi, radians, sin, sqrt
+
+NAN = float("nan")
+
+# Tamaño en grados de las celdas del índice espacial (~11 km de latitud)
+CELDA_GRADOS = 0.1
+# Radio terrestre de ``haversine``; el índice usa el mismo para no quedarse corto
+RADIO_TIERRA_KM = 6371
+
+# Campos de precio de la API que usan los sensores
+CAMPOS_PRECIO = (
+    "Precio Gasolina 95 E5",
+    "Precio Gasolina 98 E5",
+    "Precio Gasoleo Premium",
+    "Precio Gasoleo A",
+)
+
+
+def campo_precio(producto: str) -> str:
+    """Determina el campo de precio según el producto."""
+    if "95" in producto:
+        return "Precio Gasolina 95 E5"
+    elif "98" in producto:
+        return "Precio Gasolina 98 E5"
+    elif "Premium" in producto:
+        return "Precio Gasoleo Premium"
+    else:
+        return "Precio Gasoleo A"
+
+
+def safe_float(value):
+    """Convierte texto con coma decimal a float."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", "."))
+    except (ValueError, TypeError):
+        return None
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Devuelve la distancia en km entre dos coordenadas."""
+    R = RADIO_TIERRA_KM
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return R * c
+
+
+def _a_columna(valor) -> float:
+    """Convierte un valor de la API a float, usando NaN para los vacíos."""
+    if not valor:
+        return NAN
+    numero = safe_float(valor)
+    return NAN if numero is None else numero
+
+
+def _opcional(valor: float):
+    """Devuelve ``None`` en lugar de NaN."""
+    return None if isnan(valor) else valor
+
+
+class IndiceEspacial:
+    """Rejilla de celdas de ``CELDA_GRADOS`` con los índices de las estaciones de cada una.
+
+    Se guarda en columnas: ``orden`` contiene los índices de las estaciones
+    agrupados por celda y ``inicios`` marca dónde empieza en ``orden`` el tramo
+    de cada celda (``claves_lat``, ``claves_lon``).
+    """
+
+    __slots__ = ("claves_lat", "claves_lon", "inicios", "orden", "_celdas")
+
+    def __init__(self, claves_lat, claves_lon, inicios, orden):
+        self.claves_lat = claves_lat
+        self.claves_lon = claves_lon
+        self.inicios = inicios
+        self.orden = orden
+        self._celdas = {
+            (claves_lat[i], claves_lon[i]): (inicios[i], inicios[i + 1])
+            for i in range(len(claves_lat))
+        }
+
+    @classmethod
+    def construir(cls, latitudes, longitudes) -> IndiceEspacial:
+        celdas = {}
+        for i, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+            if isnan(lat) or isnan(lon):
+                continue
+            clave = (floor(lat / CELDA_GRADOS), floor(lon / CELDA_GRADOS))
+            celdas.setdefault(clave, []).append(i)
+
+        claves_lat, claves_lon = array("i"), array("i")
+        inicios, orden = array("I", [0]), array("I")
+        for (clave_lat, clave_lon), indices in celdas.items():
+            claves_lat.append(clave_lat)
+            claves_lon.append(clave_lon)
+            orden.extend(indices)
+            inicios.append(len(orden))
+        return cls(claves_lat, claves_lon, inicios, orden)
+
+    def columnas(self) -> tuple:
+        return self.claves_lat, self.claves_lon, self.inicios, self.orden
+
+    def candidatos(self, latitud: float, longitud: float, radio_km: float) -> list:
+        """Índices (ordenados) de las estaciones en las celdas que cubren el radio.
+
+        Los márgenes son los extremos exactos del círculo sobre la esfera de
+        ``haversine``, así que no se descarta ninguna estación dentro del radio.
+        """
+        angulo = radio_km / RADIO_TIERRA_KM
+        margen_lat = degrees(angulo)
+        # Máxima diferencia de longitud del círculo; si alcanza un polo, todas
+        cociente = sin(angulo) / cos(radians(latitud))
+        if angulo >= pi / 2 or abs(latitud) + margen_lat >= 90 or cociente >= 1:
+            margen_lon = 180.0
+        else:
+            margen_lon = degrees(asin(cociente))
+        lat_min = floor((latitud - margen_lat) / CELDA_GRADOS)
+        lat_max = floor((latitud + margen_lat) / CELDA_GRADOS)
+        lon_min = floor((longitud - margen_lon) / CELDA_GRADOS)
+        lon_max = floor((longitud + margen_lon) / CELDA_GRADOS)
+
+        indices = []
+        for clave_lat in range(lat_min, lat_max + 1):
+            for clave_lon in range(lon_min, lon_max + 1):
+                tramo = self._celdas.get((clave_lat, clave_lon))
+                if tramo is not None:
+                    indices.extend(self.orden[tramo[0]:tramo[1]])
+        indices.sort()
+        return indices
+
+
+# Cabecera del formato binario: firma y número de estaciones, seguidos de la
+# longitud en bytes de cada bloque. Los bloques numéricos usan el orden de bytes
+# nativo, ya que solo se intercambian entre procesos de la misma máquina.
+_FIRMA = b"GGT2"
+_SEPARADOR = "\0"
+
+
+class TablaEstaciones:
+    """Estaciones normalizadas en columnas compactas.
+
+    Los números se guardan en ``array('d')`` (NaN para los valores ausentes) y
+    los textos en listas, de forma que la tabla ocupa una fracción de la lista
+    de diccionarios original y los sensores no tienen que volver a convertir
+    los decimales con coma en cada lectura.
+    """
+
+    __slots__ = (
+        "nombres",
+        "direcciones",
+        "localidades",
+        "provincias",
+        "latitudes",
+        "longitudes",
+        "precios",
+        "indice",
+        "_orden_precio",
+    )
+
+    def __init__(self, nombres, direcciones, localidades, provincias, latitudes, longitudes, precios, indice=None):
+        self.nombres = nombres
+        self.direcciones = direcciones
+        self.localidades = localidades
+        self.provincias = provincias
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.precios = precios
+        self.indice = indice if indice is not None else IndiceEspacial.construir(latitudes, longitudes)
+        self._orden_precio = {}
+
+    @classmethod
+    def desde_api(cls, estaciones: list) -> TablaEstaciones:
+        """Construye la tabla a partir de ``ListaEESSPrecio``."""
+        return cls(
+            nombres=[e.get("Rótulo", "Desconocido") for e in estaciones],
+            direcciones=[e.get("Dirección", "N/A") for e in estaciones],
+            localidades=[e.get("Localidad", "N/A") for e in estaciones],
+            provincias=[e.get("Provincia", "") for e in estaciones],
+            latitudes=array("d", [_a_columna(e.get("Latitud")) for e in estaciones]),
+            longitudes=array("d", [_a_columna(e.get("Longitud (WGS84)")) for e in estaciones]),
+            precios={
+                campo: array("d", [_a_columna(e.get(campo)) for e in estaciones])
+                for campo in CAMPOS_PRECIO
+            },
+        )
+
+    def a_bytes(self) -> bytes:
+        """Serializa la tabla y su índice en un único bloque binario.
+
+        Las columnas numéricas se copian tal cual desde los ``array``, por lo
+        que el coste es proporcional al tamaño de los datos y no al número de
+        estaciones, a diferencia de serializar una lista de diccionarios.
+        """
+        bloques = [
+            self.latitudes.tobytes(),
+            self.longitudes.tobytes(),
+            *(self.precios[campo].tobytes() for campo in CAMPOS_PRECIO),
+            # Un separador dentro de un texto desplazaría las filas al leerlo
+            *(
+                _SEPARADOR.join(t.replace(_SEPARADOR, "") for t in columna).encode("utf-8")
+                for columna in self._textos()
+            ),
+            *(columna.tobytes() for columna in self.indice.columnas()),
+        ]
+        cabecera = struct.pack(f"<4sI{len(bloques)}Q", _FIRMA, len(self), *map(len, bloques))
+        return b"".join([cabecera, *bloques])
+
+    @classmethod
+    def desde_bytes(cls, datos) -> TablaEstaciones:
+        """Reconstruye una tabla serializada con ``a_bytes``.
+
+        Lanza ``ValueError`` si el bloque está truncado o alguna columna no
+        tiene una fila por estación, en lugar de devolver filas desplazadas.
+        """
+        num_bloques = 2 + len(CAMPOS_PRECIO) + 4 + 4
+        formato = f"<4sI{num_bloques}Q"
+        try:
+            firma, n, *longitudes = struct.unpack_from(formato, datos)
+        except struct.error as err:
+            raise ValueError("Tabla de estaciones truncada") from err
+        if firma != _FIRMA:
+            raise ValueError("Formato de tabla de estaciones desconocido")
+
+        vista = memoryview(datos)
+        bloques = []
+        posicion = struct.calcsize(formato)
+        for longitud in longitudes:
+            bloques.append(vista[posicion:posicion + longitud])
+            posicion += longitud
+        if posicion != len(vista):
+            raise ValueError("Tabla de estaciones truncada o con datos sobrantes")
+
+        def numeros(bloque, tipo="d"):
+            columna = array(tipo)
+            # frombytes lanza ValueError si el bloque no es múltiplo del tamaño del tipo
+            columna.frombytes(bloque)
+            return columna
+
+        def textos(bloque):
+            return str(bloque, "utf-8").split(_SEPARADOR) if n else []
+
+        latitudes, longitudes_, *resto = bloques
+        precios = resto[: len(CAMPOS_PRECIO)]
+        nombres, direcciones, localidades, provincias = resto[len(CAMPOS_PRECIO): len(CAMPOS_PRECIO) + 4]
+        claves_lat, claves_lon, inicios, orden = resto[len(CAMPOS_PRECIO) + 4:]
+
+        columnas = {
+            "nombres": textos(nombres),
+            "direcciones": textos(direcciones),
+            "localidades": textos(localidades),
+            "provincias": textos(provincias),
+            "latitudes": numeros(latitudes),
+            "longitudes": numeros(longitudes_),
+            **{campo: numeros(b) for campo, b in zip(CAMPOS_PRECIO, precios)},
+        }
+        for nombre, columna in columnas.items():
+            if len(columna) != n:
+                raise ValueError(
+                    f"La columna {nombre} tiene {len(columna)} filas en lugar de {n}"
+                )
+
+        indice = (
+            numeros(claves_lat, "i"),
+            numeros(claves_lon, "i"),
+            numeros(inicios, "I"),
+            numeros(orden, "I"),
+        )
+        claves_lat, claves_lon, inicios, orden = indice
+        if (
+            len(claves_lat) != len(claves_lon)
+            or len(inicios) != len(claves_lat) + 1
+            or inicios[0] != 0
+            or inicios[-1] != len(orden)
+            or (orden and max(orden) >= n)
+        ):
+            raise ValueError("Índice espacial de la tabla de estaciones inconsistente")
+
+        return cls(
+            nombres=columnas["nombres"],
+            direcciones=columnas["direcciones"],
+            localidades=columnas["localidades"],
+            provincias=columnas["provincias"],
+            latitudes=columnas["latitudes"],
+            longitudes=columnas["longitudes"],
+            precios={campo: columnas[campo] for campo in CAMPOS_PRECIO},
+            indice=IndiceEspacial(*indice),
+        )
+
+    def _textos(self):
+        return self.nombres, self.direcciones, self.localidades, self.provincias
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+    def precio(self, indice: int, campo: str):
+        """Precio de una estación o ``None`` si no lo tiene."""
+        return _opcional(self.precios[campo][indice])
+
+    def coordenadas(self, indice: int):
+        """Latitud y longitud de una estación (``None`` si faltan)."""
+        return _opcional(self.latitudes[indice]), _opcional(self.longitudes[indice])
+
+    def estacion(self, indice: int, campo: str) -> dict:
+        """Datos de una estación con el formato de los atributos de los sensores."""
+        latitud, longitud = self.coordenadas(indice)
+        return {
+            "nombre": self.nombres[indice],
+            "direccion": self.direcciones[indice],
+            "localidad": self.localidades[indice],
+            "precio": self.precio(indice, campo),
+            "latitud": latitud,
+            "longitud": longitud,
+        }
+
+    def en_radio(self, latitud: float, longitud: float, radio_km: float) -> list:
+        """Pares ``(índice, distancia_km)`` de las estaciones dentro del radio, en orden de tabla."""
+        resultado = []
+        for i in self.indice.candidatos(latitud, longitud, radio_km):
+            distancia = haversine(latitud, longitud, self.latitudes[i], self.longitudes[i])
+            if distancia <= radio_km:
+                resultado.append((i, distancia))
+        return resultado
+
+    def indices_por_precio(self, campo: str) -> list:
+        """Índices de las estaciones con precio, ordenados de menor a mayor.
+
+        El resultado se calcula una vez por tabla y campo.
+        """
+        orden = self._orden_precio.get(campo)
+        if orden is None:
+            precios = self.precios[campo]
+            orden = sorted(
+                (i for i, p in enumerate(precios) if not isnan(p)),
+                key=precios.__getitem__,
+            )
+            self._orden_precio[campo] = orden
+        return orden
@@ -0,0 +1,39 @@
+"""Descarga y normalización de los datos, sin dependencias de Home Assistant.
+
+Es el punto de entrada del proceso trabajador (ver ``trabajador.py``): al
+arrancar, ese proceso solo importa este módulo, ``api`` y ``datos``, de modo
+que no carga Home Assistant para ejecutar ``requests`` y ``json``.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from .api import get_estaciones_por_provincia, get_estaciones_todas
+from .datos import TablaEstaciones
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def descargar_tabla(provincia_id, metricas: dict) -> TablaEstaciones:
+    """Descarga y normaliza los datos de una provincia o de toda España."""
+    if provincia_id:
+        _LOGGER.debug("Actualizando datos por provincia %s", provincia_id)
+        estaciones = get_estaciones_por_provincia(provincia_id, metricas)
+    else:
+        _LOGGER.debug("Actualizando datos de toda España (modo coordenadas)")
+        estaciones = get_estaciones_todas(metricas)
+
+    inicio = time.perf_counter()
+    tabla = TablaEstaciones.desde_api(estaciones)
+    metricas["normalizacion_s"] = time.perf_counter() - inicio
+    metricas["estaciones"] = len(tabla)
+    return tabla
+
+
+def descargar_compactado(provincia_id) -> tuple[bytes, dict]:
+    """Punto de entrada del proceso trabajador: devuelve la tabla serializada y las métricas."""
+    metricas = {}
+    tabla = descargar_tabla(provincia_id, metricas)
+    return tabla.a_bytes(), metricas
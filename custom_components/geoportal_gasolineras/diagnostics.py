@@ -0,0 +1,42 @@
+"""Diagnósticos de la integración Geoportal Gasolineras."""
+
+from __future__ import annotations
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+# Las coordenadas identifican la ubicación del usuario
+TO_REDACT = {"latitud", "longitud"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Devuelve la configuración y la telemetría de refresco de una entrada."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+    diagnostico = {"config": async_redact_data(dict(entry.data), TO_REDACT)}
+    if coordinator is None:
+        return diagnostico
+
+    planificador = coordinator.planificador
+    diagnostico["coordinador"] = {
+        "ultimo_refresco_correcto": coordinator.last_update_success,
+        "planificador": {
+            "periodo": str(planificador.periodo),
+            "ultima_publicacion": _iso(planificador.ultima_publicacion),
+            "ultima_descarga": _iso(planificador.ultima_descarga),
+            "sin_cambios": planificador.sin_cambios,
+            "sondeos_fallidos": planificador.sondeos_fallidos,
+            "desfase": str(planificador.desfase),
+            "proximo_sondeo": _iso(coordinator.proximo_sondeo),
+        },
+    }
+    diagnostico["telemetria"] = coordinator.telemetria.resumen(dt_util.utcnow())
+    return diagnostico
+
+
+def _iso(instante):
+    return instante.isoformat() if instante is not None else None
@@ -0,0 +1,77 @@
+"""Instantánea nacional de estaciones que usa el flujo de configuración para buscar y previsualizar."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .busqueda import IndiceBusqueda
+from .const import DOMAIN
+from .datos import TablaEstaciones
+from .descarga import descargar_tabla
+
+# Tiempo durante el que se reutiliza una instantánea descargada por el flujo
+VIGENCIA_INSTANTANEA = timedelta(hours=1)
+
+
+class Instantanea:
+    """Tabla nacional con su índice de búsqueda, construido la primera vez que se usa."""
+
+    def __init__(self, tabla: TablaEstaciones, instante: datetime):
+        self.tabla = tabla
+        self.instante = instante
+        self._busqueda = None
+
+    @property
+    def busqueda(self) -> IndiceBusqueda:
+        if self._busqueda is None:
+            self._busqueda = IndiceBusqueda(self.tabla)
+        return self._busqueda
+
+
+_instantanea: Instantanea | None = None
+_cancelar_caducidad = None
+
+
+async def async_obtener_instantanea(hass: HomeAssistant) -> Instantanea:
+    """Devuelve una instantánea nacional reciente.
+
+    Reutiliza los datos de cualquier entrada en modo coordenadas ya cargada y,
+    si no hay ninguna, descarga los datos una vez. La instantánea se suelta al
+    cabo de ``VIGENCIA_INSTANTANEA`` o cuando termina el flujo de configuración
+    (``liberar_instantanea``), para no retener la tabla nacional y su índice.
+    """
+    ahora = dt_util.utcnow()
+
+    for datos in hass.data.get(DOMAIN, {}).values():
+        coordinator = datos.get("coordinator")
+        if coordinator is None or coordinator.provincia_id or not coordinator.data:
+            continue
+        if _instantanea is None or _instantanea.tabla is not coordinator.data:
+            _guardar_instantanea(hass, Instantanea(coordinator.data, ahora))
+        return _instantanea
+
+    if _instantanea is None or ahora - _instantanea.instante > VIGENCIA_INSTANTANEA:
+        tabla = await hass.async_add_executor_job(descargar_tabla, None, {})
+        _guardar_instantanea(hass, Instantanea(tabla, ahora))
+    return _instantanea
+
+
+def _guardar_instantanea(hass: HomeAssistant, instantanea: Instantanea):
+    global _instantanea, _cancelar_caducidad
+    liberar_instantanea()
+    _instantanea = instantanea
+    _cancelar_caducidad = async_call_later(hass, VIGENCIA_INSTANTANEA, liberar_instantanea)
+
+
+@callback
+def liberar_instantanea(_ahora=None):
+    """Suelta la instantánea y cancela su caducidad pendiente."""
+    global _instantanea, _cancelar_caducidad
+    if _cancelar_caducidad is not None:
+        _cancelar_caducidad()
+        _cancelar_caducidad = None
+    _instantanea = None
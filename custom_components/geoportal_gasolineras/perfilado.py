@@ -0,0 +1,147 @@
+"""Servicio de perfilado bajo demanda del refresco de una entrada.
+
+El perfilador y ``tracemalloc`` solo se activan mientras se ejecuta el
+servicio, de modo que no hay ningún coste cuando no se usa.
+
+Desde Python 3.12 ``cProfile`` se apoya en ``sys.monitoring``: perfila todos
+los hilos del proceso (el executor que descarga y normaliza, pero también el
+bucle de eventos y el resto de Home Assistant mientras dura el refresco) y
+solo puede haber un perfilador activo. Por eso solo se permite un perfilado
+a la vez y se rechaza si otra herramienta (p. ej. la integración
+``profiler``) ya está perfilando.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import time
+import tracemalloc
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICIO_PERFILAR = "perfilar"
+# Profundidad de pila guardada por tracemalloc para agrupar las asignaciones
+PROFUNDIDAD_TRACEMALLOC = 10
+
+# Un único perfilado a la vez en todo Home Assistant
+_bloqueo = asyncio.Lock()
+
+SCHEMA_PERFILAR = vol.Schema(
+    {
+        vol.Required("entry_id"): cv.string,
+        vol.Optional("lineas", default=40): vol.All(vol.Coerce(int), vol.Range(min=1, max=500)),
+    }
+)
+
+
+def async_registrar_servicios(hass: HomeAssistant):
+    """Registra el servicio ``geoportal_gasolineras.perfilar``."""
+
+    async def _perfilar(call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data["entry_id"]
+        datos = hass.data.get(DOMAIN, {}).get(entry_id)
+        coordinator = datos and datos["coordinator"]
+        if coordinator is None:
+            raise HomeAssistantError(f"No hay ninguna entrada cargada con id {entry_id}")
+        if _bloqueo.locked():
+            raise HomeAssistantError("Ya hay un perfilado en curso")
+
+        async with _bloqueo:
+            ruta = await async_perfilar(hass, coordinator, entry_id, call.data["lineas"])
+        return {"fichero": ruta}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICIO_PERFILAR,
+        _perfilar,
+        schema=SCHEMA_PERFILAR,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def async_perfilar(hass: HomeAssistant, coordinator, entry_id: str, lineas: int) -> str:
+    """Fuerza un refresco bajo cProfile y tracemalloc y escribe el informe.
+
+    Devuelve la ruta del fichero generado en el directorio de configuración.
+    El perfilador se activa antes de forzar el refresco, fuera de él, para que
+    un fallo al activarlo no se convierta en un refresco fallido de la entrada.
+    """
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError as err:
+        raise HomeAssistantError(
+            f"No se puede activar cProfile, hay otra herramienta de perfilado activa: {err}"
+        ) from err
+
+    ya_trazando = tracemalloc.is_tracing()
+    try:
+        if not ya_trazando:
+            tracemalloc.start(PROFUNDIDAD_TRACEMALLOC)
+        tracemalloc.reset_peak()
+
+        inicio = time.perf_counter()
+        coordinator.perfil = perfil
+        try:
+            await coordinator.async_refresh()
+            instantanea = tracemalloc.take_snapshot()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            coordinator.perfil = None
+            if not ya_trazando:
+                tracemalloc.stop()
+    finally:
+        perfil.disable()
+    duracion = time.perf_counter() - inicio
+
+    ahora = dt_util.now()
+    ruta = hass.config.path(f"{DOMAIN}_perfil_{ahora:%Y%m%d_%H%M%S}.txt")
+    cabecera = [
+        f"Perfil de refresco - entrada {entry_id}",
+        f"Fecha: {ahora.isoformat()}",
+        f"Refresco correcto: {coordinator.last_update_success}",
+        f"Duración total: {duracion:.3f} s",
+        f"Pico de memoria: {pico / 1024 / 1024:.1f} MiB",
+    ]
+    await hass.async_add_executor_job(
+        _escribir_informe, ruta, cabecera, perfil, instantanea, lineas
+    )
+    _LOGGER.info("Perfil de la entrada %s guardado en %s", entry_id, ruta)
+    return ruta
+
+
+def _escribir_informe(ruta, cabecera, perfil, instantanea, lineas):
+    """Escribe las estadísticas de cProfile y los principales puntos de asignación."""
+    salida = io.StringIO()
+    salida.write("\n".join(cabecera) + "\n")
+
+    for orden in ("cumulative", "tottime"):
+        salida.write(f"\n===== cProfile ordenado por {orden} =====\n")
+        pstats.Stats(perfil, stream=salida).strip_dirs().sort_stats(orden).print_stats(lineas)
+
+    instantanea = instantanea.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+    )
+    salida.write(f"\n===== tracemalloc: {lineas} principales puntos de asignación =====\n")
+    for estadistica in instantanea.statistics("lineno")[:lineas]:
+        salida.write(f"{estadistica}\n")
+
+    salida.write("\n===== tracemalloc: principales pilas de asignación =====\n")
+    for estadistica in instantanea.statistics("traceback")[: min(lineas, 10)]:
+        salida.write(f"\n{estadistica.size / 1024:.1f} KiB en {estadistica.count} bloques\n")
+        salida.write("\n".join(estadistica.traceback.format()) + "\n")
+
+    with open(ruta, "w", encoding="utf-8") as fichero:
+        fichero.write(salida.getvalue())
@@ -0,0 +1,152 @@
+"""Planificación de refrescos según la cadencia de publicación del Ministerio."""
+
+from __future__ import annotations
+
+import random
+from collections import deque
+from datetime import datetime, timedelta
+from statistics import median
+from zoneinfo import ZoneInfo
+
+from .const import (
+    DESFASE_MAXIMO,
+    ESPERA_MINIMA_SONDEO,
+    MARGEN_PUBLICACION,
+    PERIODO_PUBLICACION_INICIAL,
+    PERIODO_PUBLICACION_MAXIMO,
+    PERIODO_PUBLICACION_MINIMO,
+    SONDEOS_FALLIDOS_MAXIMOS,
+)
+
+ZONA_MINISTERIO = ZoneInfo("Europe/Madrid")
+
+
+def parsear_fecha(texto: str | None) -> datetime | None:
+    """Convierte el campo ``Fecha`` de la API (``dd/mm/aaaa hh:mm:ss``, hora peninsular)."""
+    if not texto:
+        return None
+    try:
+        return datetime.strptime(texto, "%d/%m/%Y %H:%M:%S").replace(tzinfo=ZONA_MINISTERIO)
+    except ValueError:
+        return None
+
+
+class PlanificadorPublicacion:
+    """Aprende la cadencia de publicación a partir de los cambios de ``Fecha``.
+
+    Programa el siguiente sondeo justo después de la próxima publicación
+    esperada, espacia los sondeos de forma exponencial mientras no haya datos
+    nuevos y añade a cada entrada un desfase fijo para que varias entradas no
+    consulten el servicio en el mismo minuto.
+
+    Si el sondeo falla o su ``Fecha`` no se puede leer, no se depende de él
+    para siempre: se fuerza una descarga completa tras
+    ``SONDEOS_FALLIDOS_MAXIMOS`` sondeos fallidos seguidos o cuando la última
+    descarga correcta tiene más de ``PERIODO_PUBLICACION_MAXIMO``. Mientras no
+    se haya leído ninguna ``Fecha`` se descarga en cada sondeo, como el
+    sondeo horario original.
+    """
+
+    def __init__(self, clave: str, muestras: int = 10):
+        self._publicaciones: deque[datetime] = deque(maxlen=muestras)
+        self._sin_cambios = 0
+        self._sondeos_fallidos = 0
+        self._ultima_descarga: datetime | None = None
+        # Desfase estable por entrada, entre 0 y DESFASE_MAXIMO
+        self.desfase = DESFASE_MAXIMO * random.Random(clave).random()
+
+    @property
+    def ultima_publicacion(self) -> datetime | None:
+        return self._publicaciones[-1] if self._publicaciones else None
+
+    @property
+    def sin_cambios(self) -> int:
+        """Sondeos o refrescos consecutivos sin datos nuevos."""
+        return self._sin_cambios
+
+    @property
+    def sondeos_fallidos(self) -> int:
+        """Sondeos consecutivos que han fallado o no traían una ``Fecha`` legible."""
+        return self._sondeos_fallidos
+
+    @property
+    def ultima_descarga(self) -> datetime | None:
+        """Instante de la última descarga completa correcta."""
+        return self._ultima_descarga
+
+    @property
+    def periodo(self) -> timedelta:
+        """Periodo de publicación estimado (mediana de los intervalos observados)."""
+        publicaciones = list(self._publicaciones)
+        intervalos = [
+            b - a for a, b in zip(publicaciones, publicaciones[1:]) if b > a
+        ]
+        if not intervalos:
+            return PERIODO_PUBLICACION_INICIAL
+        return min(max(median(intervalos), PERIODO_PUBLICACION_MINIMO), PERIODO_PUBLICACION_MAXIMO)
+
+    def es_nueva(self, publicacion: datetime | None) -> bool:
+        """Indica si ``publicacion`` es posterior a la última observada."""
+        if publicacion is None:
+            return False
+        ultima = self.ultima_publicacion
+        return ultima is None or publicacion > ultima
+
+    def datos_caducados(self, ahora: datetime) -> bool:
+        """Indica si hay que descargar los datos aunque el sondeo no vea una publicación nueva."""
+        return (
+            self.ultima_publicacion is None
+            or self._ultima_descarga is None
+            or ahora - self._ultima_descarga >= PERIODO_PUBLICACION_MAXIMO
+            or self._sondeos_fallidos >= SONDEOS_FALLIDOS_MAXIMOS
+        )
+
+    def registrar_sondeo(self, publicacion: datetime | None, ahora: datetime) -> bool:
+        """Registra el resultado de un sondeo (``None`` si ha fallado); devuelve si hay que descargar."""
+        if publicacion is None:
+            self._sondeos_fallidos += 1
+        else:
+            self._sondeos_fallidos = 0
+
+        if self.es_nueva(publicacion) or self.datos_caducados(ahora):
+            return True
+        self.sin_cambio()
+        return False
+
+    def registrar(self, publicacion: datetime | None, instante: datetime) -> bool:
+        """Registra una descarga correcta y la fecha de sus datos; devuelve si eran nuevos."""
+        self._ultima_descarga = instante
+        self._sondeos_fallidos = 0
+        if self.es_nueva(publicacion):
+            self._publicaciones.append(publicacion)
+            self._sin_cambios = 0
+            return True
+        self.sin_cambio()
+        return False
+
+    def sin_cambio(self):
+        """Anota un sondeo o refresco que no ha traído datos nuevos."""
+        self._sin_cambios += 1
+
+    def proximo_sondeo(self, ahora: datetime) -> datetime:
+        """Instante del próximo sondeo, como muy tarde cuando caducan los datos."""
+        cuando = self._proximo_sondeo(ahora)
+        if self._ultima_descarga is not None:
+            # Si ya han caducado, se sigue la espera exponencial para no reintentar en bucle
+            caducidad = self._ultima_descarga + PERIODO_PUBLICACION_MAXIMO + self.desfase
+            if ahora < caducidad < cuando:
+                return caducidad
+        return cuando
+
+    def _proximo_sondeo(self, ahora: datetime) -> datetime:
+        ultima = self.ultima_publicacion
+        if ultima is None:
+            return ahora + self.periodo + self.desfase
+
+        esperada = ultima + self.periodo + MARGEN_PUBLICACION
+        if self._sin_cambios == 0 and esperada > ahora:
+            return esperada + self.desfase
+
+        # La publicación ya debería haber llegado: reintentar con espera exponencial
+        espera = min(ESPERA_MINIMA_SONDEO * 2 ** self._sin_cambios, self.periodo)
+        return ahora + espera + self.desfase
@@ -3,21 +3,39 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
-from homeassistant.components.sensor import SensorEntity
+import time
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfInformation, UnitOfTime
 from homeassistant.exceptions import ConfigEntryNotReady
-from math import radians, sin, cos, sqrt, atan2
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
 
 
 from .const import DOMAIN
-from .api import get_estaciones_por_provincia, get_estaciones_todas
+from .api import get_fecha_publicacion
+from .datos import campo_precio
+from .planificador import PlanificadorPublicacion, parsear_fecha
+from .telemetria import MetricasRefresco, TelemetriaRefresco
+from .descarga import descargar_tabla
+from .trabajador import adquirir_pool, async_descargar_en_proceso, liberar_pool
 
 _LOGGER = logging.getLogger(__name__)
-SCAN_INTERVAL = timedelta(hours=4)  # actualizar cada 4h
+# (clave, nombre, unidad, icono) de los sensores de diagnóstico de telemetría
+SENSORES_TELEMETRIA = [
+    ("descarga_bytes", "Descarga", UnitOfInformation.BYTES, "mdi:download-network"),
+    ("http_s", "Tiempo HTTP", UnitOfTime.SECONDS, "mdi:timer-outline"),
+    ("parseo_s", "Tiempo parseo JSON", UnitOfTime.SECONDS, "mdi:code-json"),
+    ("normalizacion_s", "Tiempo normalización", UnitOfTime.SECONDS, "mdi:table-cog"),
+    ("estaciones", "Estaciones descargadas", None, "mdi:gas-station"),
+    ("calculo_entidades_s", "Tiempo cálculo entidades", UnitOfTime.SECONDS, "mdi:calculator"),
+    # Marca de tiempo: la interfaz muestra su antigüedad sin que haya que reescribir el estado
+    ("ultimo_ok", "Último refresco correcto", None, "mdi:clock-check-outline"),
+]
 
 
 
@@ -36,7 +54,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         provincia_id = entry.data.get("provincia_id")
         provincia_nombre = entry.data.get("provincia")
 
-        coordinator = GasolinerasCoordinator(hass, provincia_id)
+        coordinator = GasolinerasCoordinator(
+            hass, provincia_id, entry.entry_id, entry.options.get("proceso_trabajador", False)
+        )
+        hass.data[DOMAIN][entry.entry_id]["coordinator"] = coordinator
+        entry.async_on_unload(coordinator.async_shutdown)
         await coordinator.async_config_entry_first_refresh()
 
         sensores = [
@@ -54,6 +76,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
                 f"sensor.gasolinera_{i + 1}_{provincia_nombre.lower().replace(' ', '_')}_{producto.lower().replace(' ', '_')}"
             )
 
+        sensores.extend(_sensores_telemetria(coordinator, entry, provincia_nombre))
         async_add_entities(sensores)
 
         # ✅ Crear grupo automáticamente
@@ -78,42 +101,182 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         longitud = float(entry.data["longitud"])
         radio_km = int(entry.data.get("radio_km", 25))
 
-        coordinator = GasolinerasCoordinator(hass, None)
+        coordinator = GasolinerasCoordinator(
+            hass, None, entry.entry_id, entry.options.get("proceso_trabajador", False)
+        )
+        hass.data[DOMAIN][entry.entry_id]["coordinator"] = coordinator
+        entry.async_on_unload(coordinator.async_shutdown)
         await coordinator.async_config_entry_first_refresh()
 
         sensores = [
             GasolinerasCercanasSensor(coordinator, nombre, latitud, longitud, radio_km, producto)
         ]
+        sensores.extend(_sensores_telemetria(coordinator, entry, nombre))
 
         async_add_entities(sensores)
+
+
+def _sensores_telemetria(coordinator, entry, nombre):
+    """Sensores de diagnóstico con la telemetría de refresco del coordinador."""
+    return [
+        TelemetriaSensor(coordinator, entry.entry_id, nombre, clave, etiqueta, unidad, icono)
+        for clave, etiqueta, unidad, icono in SENSORES_TELEMETRIA
+    ]
+
+
 class GasolinerasCoordinator(DataUpdateCoordinator):
-    """Coordina la actualización de datos desde la API del Ministerio."""
+    """Coordina la actualización de datos desde la API del Ministerio.
+
+    No usa ``update_interval``: tras cada refresco, ``PlanificadorPublicacion``
+    decide cuándo sondear el campo "Fecha" del servicio y solo se descargan
+    los datos completos cuando hay una publicación nueva.
 
-    def __init__(self, hass, provincia_id=None):
+    Con ``proceso_trabajador`` la descarga y la normalización se hacen en un
+    proceso aparte (ver ``trabajador.py``).
+    """
+
+    def __init__(self, hass, provincia_id=None, entry_id=None, proceso_trabajador=False):
         super().__init__(
             hass,
             _LOGGER,
             name=f"{DOMAIN}_coordinator",
-            update_interval=timedelta(hours=1),
+            update_interval=None,
         )
         self.hass = hass
         self.provincia_id = provincia_id
+        self.planificador = PlanificadorPublicacion(entry_id or str(provincia_id))
+        self._cancelar_sondeo = None
+        self.proximo_sondeo = None
+        self.telemetria = TelemetriaRefresco()
+        self._oyentes_telemetria = []
+        # cProfile.Profile activo mientras se ejecuta el servicio perfilar (ver perfilado.py)
+        self.perfil = None
+        self.proceso_trabajador = proceso_trabajador
+        if proceso_trabajador:
+            adquirir_pool()
+
+    @callback
+    def async_add_oyente_telemetria(self, oyente):
+        """Registra un callback que se llama tras cada refresco y devuelve la función para quitarlo.
+
+        A diferencia de ``async_add_listener``, también se llama tras los refrescos
+        fallidos. Tras los correctos se llama después de actualizar las entidades,
+        para que el tiempo de cálculo registrado sea el de este refresco.
+        """
+        self._oyentes_telemetria.append(oyente)
+        return lambda: self._oyentes_telemetria.remove(oyente)
 
     async def _async_update_data(self):
         """Actualiza los datos según el modo."""
+        metricas = {}
+        instante = dt_util.utcnow()
+        inicio = time.perf_counter()
         try:
-            if self.provincia_id:
-                _LOGGER.debug("Actualizando datos por provincia %s", self.provincia_id)
-                return await self.hass.async_add_executor_job(get_estaciones_por_provincia, self.provincia_id)
+            # El perfilado siempre se hace en este proceso para poder medirlo
+            if self.proceso_trabajador and self.perfil is None:
+                tabla = await async_descargar_en_proceso(self.hass, self.provincia_id, metricas)
             else:
-                _LOGGER.debug("Actualizando datos de toda España (modo coordenadas)")
-                return await self.hass.async_add_executor_job(get_estaciones_todas)
+                tabla = await self.hass.async_add_executor_job(descargar_tabla, self.provincia_id, metricas)
         except Exception as err:
+            self.telemetria.registrar_refresco(
+                MetricasRefresco(instante, total_s=time.perf_counter() - inicio, error=str(err), **metricas)
+            )
+            self._avisar_oyentes_telemetria()
+            self.planificador.sin_cambio()
+            # Si falla la primera carga, Home Assistant ya reintenta la configuración
+            if self.data is not None:
+                self._programar_sondeo()
             raise UpdateFailed(f"Error al obtener datos de la API: {err}") from err
 
+        # Los oyentes se avisan en async_update_listeners, tras recalcular las entidades
+        self.telemetria.registrar_refresco(
+            MetricasRefresco(instante, total_s=time.perf_counter() - inicio, **metricas)
+        )
+        self.planificador.registrar(parsear_fecha(metricas.get("fecha")), instante)
+        self._programar_sondeo()
+        return tabla
+
+    @callback
+    def _programar_sondeo(self):
+        """Programa el próximo sondeo de la fecha de publicación."""
+        if self._cancelar_sondeo is not None:
+            self._cancelar_sondeo()
+        cuando = self.proximo_sondeo = self.planificador.proximo_sondeo(dt_util.utcnow())
+        _LOGGER.debug(
+            "Próximo sondeo de %s el %s (periodo estimado %s)",
+            self.name,
+            cuando,
+            self.planificador.periodo,
+        )
+        self._cancelar_sondeo = async_track_point_in_utc_time(self.hass, self._async_sondear, cuando)
+
+    async def _async_sondear(self, _ahora):
+        """Consulta la fecha de publicación y refresca si hay datos nuevos o los actuales han caducado."""
+        self._cancelar_sondeo = None
+        self.proximo_sondeo = None
+        try:
+            fecha = parsear_fecha(await self.hass.async_add_executor_job(get_fecha_publicacion))
+        except Exception as err:
+            _LOGGER.debug("Error al sondear la fecha de publicación: %s", err)
+            fecha = None
+
+        if self.planificador.registrar_sondeo(fecha, dt_util.utcnow()):
+            # El refresco vuelve a programar el siguiente sondeo
+            await self.async_refresh()
+            return
+
+        self._programar_sondeo()
+
+    async def async_shutdown(self):
+        """Cancela el sondeo pendiente y libera el proceso trabajador al descargar la entrada."""
+        if self._cancelar_sondeo is not None:
+            self._cancelar_sondeo()
+            self._cancelar_sondeo = None
+            self.proximo_sondeo = None
+        if self.proceso_trabajador:
+            self.proceso_trabajador = False
+            liberar_pool()
+        await super().async_shutdown()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Actualiza las entidades y, después, los sensores de telemetría."""
+        super().async_update_listeners()
+        self._avisar_oyentes_telemetria()
+
+    @callback
+    def _avisar_oyentes_telemetria(self):
+        for oyente in list(self._oyentes_telemetria):
+            oyente()
+
+
+class _GasolinerasSensor(SensorEntity):
+    """Base de los sensores que se actualizan cuando el coordinador trae datos nuevos."""
+
+    _attr_should_poll = False
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+
+    @callback
+    def async_write_ha_state(self):
+        """Escribe el estado y registra en la telemetría cuánto ha tardado.
+
+        Se mide la escritura completa porque calcula tanto el estado como los
+        atributos (que en varios sensores recorren las estaciones por separado):
+        una muestra por entidad y refresco.
+        """
+        inicio = time.perf_counter()
+        try:
+            super().async_write_ha_state()
+        finally:
+            self.coordinator.telemetria.registrar_entidad(self._attr_name, time.perf_counter() - inicio)
+
+    async def async_update(self):
+        await self.coordinator.async_request_refresh()
 
 
-class TotalEstacionesSensor(SensorEntity):
+class TotalEstacionesSensor(_GasolinerasSensor):
     """Sensor que muestra el número total de estaciones."""
 
     def __init__(self, coordinator, provincia):
@@ -127,11 +290,8 @@ class TotalEstacionesSensor(SensorEntity):
         estaciones = self.coordinator.data or []
         return len(estaciones)
 
-    async def async_update(self):
-        await self.coordinator.async_request_refresh()
 
-
-class GasolineraBarataSensor(SensorEntity):
+class GasolineraBarataSensor(_GasolinerasSensor):
     """Sensor que muestra la gasolinera más barata."""
 
     def __init__(self, coordinator, provincia, producto):
@@ -143,49 +303,26 @@ class GasolineraBarataSensor(SensorEntity):
 
     @property
     def native_value(self):
-        estaciones = self.coordinator.data or []
-        if not estaciones:
+        tabla = self.coordinator.data
+        if not tabla:
             return "Sin datos"
 
         # Buscar el campo de precio según producto
-        campo_precio = self._get_campo_precio()
-
-        # Filtrar estaciones que tengan precio válido
-        estaciones_validas = [
-            e for e in estaciones if e.get(campo_precio) and e.get(campo_precio) != ""
-        ]
+        campo = campo_precio(self.producto)
 
-        if not estaciones_validas:
+        # Estaciones con precio válido, ya ordenadas de menor a mayor
+        orden = tabla.indices_por_precio(campo)
+        if not orden:
             return "Sin precio disponible"
 
-        # Encontrar la más barata
-        mas_barata = min(
-            estaciones_validas,
-            key=lambda e: float(e[campo_precio].replace(",", "."))
-        )
-
-        nombre = mas_barata.get("Rótulo", "Desconocido")
-        precio = mas_barata.get(campo_precio, "?")
-        localidad = mas_barata.get("Localidad", "Desconocido")
+        mas_barata = orden[0]
+        nombre = tabla.nombres[mas_barata]
+        precio = f"{tabla.precio(mas_barata, campo):.3f}".replace(".", ",")
+        localidad = tabla.localidades[mas_barata]
 
         return f"{nombre} - {precio} €/L ({localidad})"
 
-    def _get_campo_precio(self):
-        """Determina el campo de precio según el producto."""
-        if "95" in self.producto:
-            return "Precio Gasolina 95 E5"
-        elif "98" in self.producto:
-            return "Precio Gasolina 98 E5"
-        elif "Premium" in self.producto:
-            return "Precio Gasoleo Premium"
-        else:
-            return "Precio Gasoleo A"
-
-    async def async_update(self):
-        await self.coordinator.async_request_refresh()
-
-
-class ListaGasolinerasBaratasSensor(SensorEntity):
+class ListaGasolinerasBaratasSensor(_GasolinerasSensor):
     """Sensor que muestra una lista de las gasolineras más baratas."""
 
     def __init__(self, coordinator, provincia, producto):
@@ -225,60 +362,17 @@ class ListaGasolinerasBaratasSensor(SensorEntity):
 
     def _get_estaciones_validas(self):
         """Filtra y ordena estaciones por precio."""
-        estaciones = self.coordinator.data or []
+        tabla = self.coordinator.data
+        if not tabla:
+            return []
 
         # Determinar campo de precio según producto
-        campo_precio = self._get_campo_precio()
-
-        estaciones_validas = []
-        for e in estaciones:
-            valor = e.get(campo_precio)
-            if not valor:
-                continue
-            try:
-                precio = float(valor.replace(",", "."))
-            except ValueError:
-                continue
-
-            estaciones_validas.append(
-                {
-                    "nombre": e.get("Rótulo", "Desconocido"),
-                    "direccion": e.get("Dirección", "N/A"),
-                    "localidad": e.get("Localidad", "N/A"),
-                    "precio": precio,
-                    "latitud": self._safe_float(e.get("Latitud")),
-                    "longitud": self._safe_float(e.get("Longitud (WGS84)")),
-                }
-            )
-
-        estaciones_validas.sort(key=lambda x: x["precio"])
-        return estaciones_validas
-
-    def _get_campo_precio(self):
-        """Determina el campo de precio según el producto."""
-        if "95" in self.producto:
-            return "Precio Gasolina 95 E5"
-        elif "98" in self.producto:
-            return "Precio Gasolina 98 E5"
-        elif "Premium" in self.producto:
-            return "Precio Gasoleo Premium"
-        else:
-            return "Precio Gasoleo A"
-
-    def _safe_float(self, value):
-        """Convierte texto con coma decimal a float."""
-        if value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-        try:
-            return float(str(value).replace(",", "."))
-        except (ValueError, TypeError):
-            return None
+        campo = campo_precio(self.producto)
+        return [tabla.estacion(i, campo) for i in tabla.indices_por_precio(campo)]
 
 
 # ✅ NUEVO: Sensor individual para cada gasolinera del top 5
-class GasolineraIndividualSensor(SensorEntity):
+class GasolineraIndividualSensor(_GasolinerasSensor):
     """Sensor individual para mostrar cada gasolinera en el mapa."""
 
     def __init__(self, coordinator, provincia, producto, index):
@@ -317,62 +411,17 @@ class GasolineraIndividualSensor(SensorEntity):
 
     def _get_estaciones_validas(self):
         """Filtra y ordena estaciones por precio."""
-        estaciones = self.coordinator.data or []
-        campo_precio = self._get_campo_precio()
-
-        estaciones_validas = []
-        for e in estaciones:
-            valor = e.get(campo_precio)
-            if not valor:
-                continue
-            try:
-                precio = float(valor.replace(",", "."))
-            except ValueError:
-                continue
-
-            estaciones_validas.append(
-                {
-                    "nombre": e.get("Rótulo", "Desconocido"),
-                    "direccion": e.get("Dirección", "N/A"),
-                    "localidad": e.get("Localidad", "N/A"),
-                    "precio": precio,
-                    "latitud": self._safe_float(e.get("Latitud")),
-                    "longitud": self._safe_float(e.get("Longitud (WGS84)")),
-                }
-            )
-
-        estaciones_validas.sort(key=lambda x: x["precio"])
-        return estaciones_validas
-
-    def _get_campo_precio(self):
-        """Determina el campo de precio según el producto."""
-        if "95" in self.producto:
-            return "Precio Gasolina 95 E5"
-        elif "98" in self.producto:
-            return "Precio Gasolina 98 E5"
-        elif "Premium" in self.producto:
-            return "Precio Gasoleo Premium"
-        else:
-            return "Precio Gasoleo A"
-
-    def _safe_float(self, value):
-        """Convierte texto con coma decimal a float."""
-        if value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-        try:
-            return float(str(value).replace(",", "."))
-        except (ValueError, TypeError):
-            return None
-
-    async def async_update(self):
-        await self.coordinator.async_request_refresh()
+        tabla = self.coordinator.data
+        if not tabla:
+            return []
 
+        # Determinar campo de precio según producto
+        campo = campo_precio(self.producto)
+        return [tabla.estacion(i, campo) for i in tabla.indices_por_precio(campo)]
 
 
 
-class GasolinerasCercanasSensor(SensorEntity):
+class GasolinerasCercanasSensor(_GasolinerasSensor):
     """Sensor que muestra las gasolineras dentro de un radio determinado."""
 
     def __init__(self, coordinator, nombre, latitud_centro, longitud_centro, radio_km, producto):
@@ -400,61 +449,58 @@ class GasolinerasCercanasSensor(SensorEntity):
 
     def _get_gasolineras_en_radio(self):
         """Filtra las gasolineras dentro del radio especificado."""
-        estaciones = self.coordinator.data or []
+        tabla = self.coordinator.data
+        if not tabla:
+            return []
 
-        if "95" in self.producto:
-            campo_precio = "Precio Gasolina 95 E5"
-        elif "98" in self.producto:
-            campo_precio = "Precio Gasolina 98 E5"
-        elif "Premium" in self.producto:
-            campo_precio = "Precio Gasoleo Premium"
-        else:
-            campo_precio = "Precio Gasoleo A"
+        campo = campo_precio(self.producto)
 
         gasolineras_cercanas = []
-        for e in estaciones:
-            try:
-                lat = self._safe_float(e.get("Latitud"))
-                lon = self._safe_float(e.get("Longitud (WGS84)"))
-                precio = self._safe_float(e.get(campo_precio))
-            except (ValueError, TypeError):
-                continue
-
-            if lat is None or lon is None:
-                continue
-
-            distancia = self._haversine(self.lat_centro, self.lon_centro, lat, lon)
-            if distancia <= self.radio_km:
-                gasolineras_cercanas.append(
-                    {
-                        "nombre": e.get("Rótulo", "Desconocido"),
-                        "direccion": e.get("Dirección", "N/A"),
-                        "localidad": e.get("Localidad", "N/A"),
-                        "precio": precio,
-                        "latitud": lat,
-                        "longitud": lon,
-                        "distancia_km": round(distancia, 2),
-                    }
-                )
+        for i, distancia in tabla.en_radio(self.lat_centro, self.lon_centro, self.radio_km):
+            gasolinera = tabla.estacion(i, campo)
+            gasolinera["distancia_km"] = round(distancia, 2)
+            gasolineras_cercanas.append(gasolinera)
 
         return gasolineras_cercanas
 
-    def _haversine(self, lat1, lon1, lat2, lon2):
-        """Devuelve la distancia en km entre dos coordenadas."""
-        R = 6371
-        dlat = radians(lat2 - lat1)
-        dlon = radians(lon2 - lon1)
-        a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        return R * c
-
-    def _safe_float(self, value):
-        """Convierte texto con coma decimal a float."""
-        if value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-        try:
-            return float(str(value).replace(",", "."))
-        except (ValueError, TypeError):
+
+class TelemetriaSensor(SensorEntity):
+    """Sensor de diagnóstico con una métrica de refresco del coordinador."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
+
+    def __init__(self, coordinator, entry_id, nombre, clave, etiqueta, unidad, icono):
+        self.coordinator = coordinator
+        self.clave = clave
+        self._attr_name = f"📊 {etiqueta} - {nombre}"
+        self._attr_icon = icono
+        self._attr_native_unit_of_measurement = unidad
+        self._attr_unique_id = f"telemetria_{clave}_{entry_id}"
+        if clave == "ultimo_ok":
+            self._attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(
+            self.coordinator.async_add_oyente_telemetria(self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self):
+        """Valor de la métrica en el último refresco."""
+        telemetria = self.coordinator.telemetria
+        if self.clave == "calculo_entidades_s":
+            return round(telemetria.calculo_entidades_s(), 4)
+        if self.clave == "ultimo_ok":
+            return telemetria.ultimo_ok
+        if telemetria.ultimo is None:
             return None
+        valor = getattr(telemetria.ultimo, self.clave)
+        return round(valor, 4) if isinstance(valor, float) else valor
+
+    @property
+    def extra_state_attributes(self):
+        """Percentiles p50/p95 sobre los últimos refrescos."""
+        if self.clave in ("calculo_entidades_s", "ultimo_ok"):
+            return {}
+        return self.coordinator.telemetria.percentiles(self.clave)
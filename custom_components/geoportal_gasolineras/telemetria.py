@@ -0,0 +1,108 @@
+"""Telemetría de los refrescos de cada coordinador."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+# Número de refrescos sobre los que se calculan los percentiles
+MUESTRAS_TELEMETRIA = 20
+
+
+@dataclass
+class MetricasRefresco:
+    """Métricas de un refresco completo del coordinador."""
+
+    instante: datetime
+    descarga_bytes: int = 0
+    http_s: float = 0.0
+    parseo_s: float = 0.0
+    normalizacion_s: float = 0.0
+    estaciones: int = 0
+    total_s: float = 0.0
+    fecha: str | None = None  # campo "Fecha" de la publicación descargada
+    error: str | None = None
+
+
+# Métricas numéricas sobre las que se calculan percentiles
+CAMPOS_METRICAS = ("descarga_bytes", "http_s", "parseo_s", "normalizacion_s", "estaciones", "total_s")
+
+
+def percentil(valores, p: float):
+    """Percentil ``p`` (0-1) por rango más cercano, o ``None`` si no hay valores."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    return ordenados[min(len(ordenados) - 1, round(p * (len(ordenados) - 1)))]
+
+
+class TelemetriaRefresco:
+    """Guarda las métricas de los últimos refrescos y los tiempos de cálculo de cada entidad."""
+
+    def __init__(self, muestras: int = MUESTRAS_TELEMETRIA):
+        self._muestras = muestras
+        self._refrescos: deque[MetricasRefresco] = deque(maxlen=muestras)
+        self._entidades: dict[str, deque[float]] = {}
+        self._ultimo_ok: datetime | None = None
+
+    @property
+    def ultimo(self) -> MetricasRefresco | None:
+        """Métricas del último refresco, correcto o no."""
+        return self._refrescos[-1] if self._refrescos else None
+
+    @property
+    def ultimo_ok(self) -> datetime | None:
+        """Instante del último refresco correcto."""
+        return self._ultimo_ok
+
+    def registrar_refresco(self, metricas: MetricasRefresco):
+        self._refrescos.append(metricas)
+        if metricas.error is None:
+            self._ultimo_ok = metricas.instante
+
+    def registrar_entidad(self, entidad: str, segundos: float):
+        """Registra el tiempo que ha tardado una entidad en calcular y escribir su estado."""
+        muestras = self._entidades.get(entidad)
+        if muestras is None:
+            muestras = self._entidades[entidad] = deque(maxlen=self._muestras)
+        muestras.append(segundos)
+
+    def calculo_entidades_s(self) -> float:
+        """Suma del último tiempo de cálculo de cada entidad."""
+        return sum(muestras[-1] for muestras in self._entidades.values() if muestras)
+
+    def edad_instantanea_s(self, ahora: datetime) -> float | None:
+        """Segundos desde el último refresco correcto."""
+        if self._ultimo_ok is None:
+            return None
+        return (ahora - self._ultimo_ok).total_seconds()
+
+    def percentiles(self, campo: str) -> dict:
+        """p50 y p95 de una métrica sobre los últimos refrescos correctos."""
+        valores = [getattr(m, campo) for m in self._refrescos if m.error is None]
+        return {"p50": percentil(valores, 0.5), "p95": percentil(valores, 0.95)}
+
+    def resumen(self, ahora: datetime) -> dict:
+        """Resumen serializable para diagnósticos."""
+        return {
+            "muestras": len(self._refrescos),
+            "ultimo": _serializar(self.ultimo) if self.ultimo else None,
+            "edad_instantanea_s": self.edad_instantanea_s(ahora),
+            "percentiles": {campo: self.percentiles(campo) for campo in CAMPOS_METRICAS},
+            "entidades": {
+                entidad: {
+                    "ultimo_s": muestras[-1] if muestras else None,
+                    "p50_s": percentil(muestras, 0.5),
+                    "p95_s": percentil(muestras, 0.95),
+                }
+                for entidad, muestras in self._entidades.items()
+            },
+            "refrescos": [_serializar(m) for m in self._refrescos],
+        }
+
+
+def _serializar(metricas: MetricasRefresco) -> dict:
+    datos = asdict(metricas)
+    datos["instante"] = metricas.instante.isoformat()
+    return datos
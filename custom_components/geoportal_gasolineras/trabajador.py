@@ -0,0 +1,82 @@
+"""Descarga, parseo y normalización de los datos en un proceso aparte.
+
+En modo proceso trabajador, la descarga, el parseo del JSON y la construcción
+de la tabla y su índice espacial se hacen fuera del intérprete de Home
+Assistant, y solo vuelve un bloque binario (``TablaEstaciones.a_bytes``) en
+lugar de miles de diccionarios serializados con pickle. El proceso ejecuta
+``descarga.descargar_compactado``, que no depende de Home Assistant.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from homeassistant.core import HomeAssistant
+
+from .datos import TablaEstaciones
+from .descarga import descargar_compactado
+
+_LOGGER = logging.getLogger(__name__)
+
+# Un único proceso compartido por todas las entradas que usan esta opción
+_pool: ProcessPoolExecutor | None = None
+_usuarios = 0
+
+
+def adquirir_pool():
+    """Registra un usuario del proceso trabajador, creándolo si hace falta."""
+    global _pool, _usuarios
+    if _pool is None:
+        _pool = _crear_pool()
+    _usuarios += 1
+
+
+def liberar_pool():
+    """Libera un usuario del proceso trabajador y lo detiene cuando no queda ninguno."""
+    global _pool, _usuarios
+    _usuarios -= 1
+    if _usuarios <= 0 and _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _usuarios = 0
+
+
+def _crear_pool() -> ProcessPoolExecutor:
+    # "spawn" evita hacer fork de un proceso con muchos hilos como Home Assistant
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+
+async def async_descargar_en_proceso(hass: HomeAssistant, provincia_id, metricas: dict) -> TablaEstaciones:
+    """Descarga y normaliza en el proceso trabajador y reconstruye la tabla.
+
+    Solo usa el proceso de quienes lo han adquirido con ``adquirir_pool``: si
+    ya se ha liberado (p. ej. al descargar la entrada durante un refresco)
+    falla en lugar de crear uno nuevo que nadie liberaría.
+    """
+    global _pool
+    pool = _pool
+    if pool is None:
+        raise RuntimeError("El proceso trabajador no está disponible")
+
+    try:
+        datos, metricas_trabajador = await hass.loop.run_in_executor(
+            pool, descargar_compactado, provincia_id
+        )
+    except BrokenProcessPool:
+        # El proceso ha muerto (p. ej. por falta de memoria): se sustituye
+        # para el siguiente refresco si sigue habiendo usuarios
+        _LOGGER.warning("El proceso trabajador ha terminado de forma inesperada; se reiniciará")
+        pool.shutdown(wait=False, cancel_futures=True)
+        if _pool is pool:
+            _pool = _crear_pool()
+        raise
+
+    metricas.update(metricas_trabajador)
+    inicio = time.perf_counter()
+    tabla = await hass.async_add_executor_job(TablaEstaciones.desde_bytes, datos)
+    metricas["normalizacion_s"] = metricas.get("normalizacion_s", 0.0) + time.perf_counter() - inicio
+    return tabla
@@ -0,0 +1,143 @@
+"""Pruebas de la búsqueda de localidades y marcas y de la vista previa por radio."""
+
+from custom_components.geoportal_gasolineras.busqueda import (
+    IndiceBusqueda,
+    centro,
+    normalizar,
+    vista_previa,
+)
+from custom_components.geoportal_gasolineras.datos import TablaEstaciones
+
+PRODUCTO = "Gasolina 95 E5"
+CAMPO = "Precio Gasolina 95 E5"
+
+
+def _estacion(nombre, localidad, provincia, latitud, longitud, precio="1,459"):
+    """Estación con el formato de ``ListaEESSPrecio`` (coma decimal)."""
+    return {
+        "Rótulo": nombre,
+        "Dirección": "CALLE MAYOR, 1",
+        "Localidad": localidad,
+        "Provincia": provincia,
+        "Latitud": str(latitud).replace(".", ","),
+        "Longitud (WGS84)": str(longitud).replace(".", ","),
+        CAMPO: precio,
+    }
+
+
+def _tabla():
+    return TablaEstaciones.desde_api(
+        [
+            _estacion("REPSOL", "ALCALÁ DE HENARES", "MADRID", 40.48, -3.36, "1,519"),
+            _estacion("CEPSA", "ALCALÁ DE HENARES", "MADRID", 40.49, -3.37, "1,489"),
+            _estacion("REPSOL", "ALCALÁ DE GUADAÍRA", "SEVILLA", 37.34, -5.84, "1,469"),
+            _estacion("BP", "ALCALÁ LA REAL", "JAÉN", 37.46, -3.92, ""),
+            _estacion("GALP", "MADRID", "MADRID", 40.42, -3.70, "1,429"),
+            _estacion("SHELL", "TORREJÓN DE ARDOZ", "MADRID", 40.46, -3.48, "1,449"),
+            _estacion("REPSOL", "SAN ISIDRO", "ALICANTE", 38.03, -0.83),
+            _estacion("CEPSA", "SAN ISIDRO", "ALMERÍA", 36.88, -2.13),
+            _estacion("BP", "SAN ISIDRO", "ALMERÍA", 36.89, -2.12),
+            _estacion("DISA", "SAN ISIDRO", "SANTA CRUZ DE TENERIFE", 28.08, -16.56),
+        ]
+    )
+
+
+def _terminos(resultados):
+    return [termino for termino, _ in resultados]
+
+
+def test_normalizar_quita_tildes_y_mayusculas():
+    assert normalizar("ALCALÁ de Guadaíra") == "alcala de guadaira"
+
+
+def test_buscar_por_prefijo_sin_importar_tildes():
+    indice = IndiceBusqueda(_tabla())
+
+    assert _terminos(indice.buscar("alcal"))[:3] == [
+        "ALCALÁ DE HENARES, MADRID",
+        "ALCALÁ DE GUADAÍRA, SEVILLA",
+        "ALCALÁ LA REAL, JAÉN",
+    ]
+    assert _terminos(indice.buscar("Alcalá")) == _terminos(indice.buscar("alcala"))
+
+
+def test_localidades_antes_que_marcas_y_por_numero_de_estaciones():
+    resultados = IndiceBusqueda(_tabla()).buscar("alcala de")
+
+    assert resultados[0] == ("ALCALÁ DE HENARES, MADRID", [0, 1])
+    assert _terminos(resultados)[2:] == [
+        "CEPSA · ALCALÁ DE HENARES, MADRID",
+        "REPSOL · ALCALÁ DE GUADAÍRA, SEVILLA",
+        "REPSOL · ALCALÁ DE HENARES, MADRID",
+    ]
+
+
+def test_buscar_marca_y_localidad():
+    assert IndiceBusqueda(_tabla()).buscar("rep alcal") == [
+        ("REPSOL · ALCALÁ DE GUADAÍRA, SEVILLA", [2]),
+        ("REPSOL · ALCALÁ DE HENARES, MADRID", [0]),
+    ]
+
+
+def test_buscar_subcadena_si_no_hay_prefijo():
+    # "rrejon" no es prefijo de ninguna palabra: se recurre a los n-gramas
+    assert _terminos(IndiceBusqueda(_tabla()).buscar("rrejon")) == [
+        "TORREJÓN DE ARDOZ, MADRID",
+        "SHELL · TORREJÓN DE ARDOZ, MADRID",
+    ]
+
+
+def test_localidades_homonimas_se_separan_por_provincia():
+    tabla = _tabla()
+    localidades = [r for r in IndiceBusqueda(tabla).buscar("san isidro") if " · " not in r[0]]
+
+    assert localidades == [
+        ("SAN ISIDRO, ALMERÍA", [7, 8]),
+        ("SAN ISIDRO, ALICANTE", [6]),
+        ("SAN ISIDRO, SANTA CRUZ DE TENERIFE", [9]),
+    ]
+    # El centro de cada una queda junto a sus estaciones, no entre provincias
+    latitud, longitud = centro(tabla, localidades[0][1])
+    assert round(latitud, 3) == 36.885 and round(longitud, 3) == -2.125
+
+
+def test_buscar_por_provincia():
+    assert _terminos(IndiceBusqueda(_tabla()).buscar("san isidro alm"))[0] == "SAN ISIDRO, ALMERÍA"
+
+
+def test_buscar_sin_resultados_y_consulta_vacia():
+    indice = IndiceBusqueda(_tabla())
+
+    assert indice.buscar("zz") == []
+    assert indice.buscar("") == []
+    assert indice.buscar("   ") == []
+
+
+def test_buscar_respeta_el_limite():
+    assert len(IndiceBusqueda(_tabla()).buscar("a", limite=2)) == 2
+
+
+def test_centro_es_el_centroide_de_las_estaciones():
+    latitud, longitud = centro(_tabla(), [0, 1])
+
+    assert round(latitud, 6) == 40.485
+    assert round(longitud, 6) == -3.365
+    assert centro(TablaEstaciones.desde_api([{"Rótulo": "X"}]), [0]) is None
+
+
+def test_vista_previa_coincide_con_en_radio():
+    tabla = _tabla()
+    en_radio = tabla.en_radio(40.42, -3.70, 30)
+    previa = vista_previa(tabla, 40.42, -3.70, 30, PRODUCTO)
+
+    assert previa["estaciones"] == len(en_radio) == 4
+    assert previa["mas_barata"] == "GALP - 1,429 €/L (MADRID)"
+    assert previa["mas_cercana"].startswith("GALP - 0.0 km")
+
+
+def test_vista_previa_sin_estaciones():
+    assert vista_previa(_tabla(), 28.1, -15.4, 5, PRODUCTO) == {
+        "estaciones": 0,
+        "mas_barata": "-",
+        "mas_cercana": "-",
+    }
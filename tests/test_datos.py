@@ -0,0 +1,143 @@
+"""Pruebas de la tabla de estaciones y su índice espacial."""
+
+import random
+from math import degrees
+
+import pytest
+
+from custom_components.geoportal_gasolineras.datos import (
+    CAMPOS_PRECIO,
+    RADIO_TIERRA_KM,
+    TablaEstaciones,
+    haversine,
+)
+
+
+def _estacion(latitud, longitud, precio="1,459", nombre="REPSOL", localidad="MADRID"):
+    """Estación con el formato de ``ListaEESSPrecio`` (coma decimal)."""
+    return {
+        "Rótulo": nombre,
+        "Dirección": "CALLE MAYOR, 1",
+        "Localidad": localidad,
+        "Provincia": "MADRID",
+        "Latitud": "" if latitud is None else str(latitud).replace(".", ","),
+        "Longitud (WGS84)": "" if longitud is None else str(longitud).replace(".", ","),
+        "Precio Gasolina 95 E5": precio,
+        "Precio Gasoleo A": "",
+    }
+
+
+def _fuerza_bruta(estaciones, latitud, longitud, radio_km):
+    """Algoritmo original del sensor: distancia a todas las estaciones."""
+    resultado = []
+    for i, e in enumerate(estaciones):
+        if not e["Latitud"] or not e["Longitud (WGS84)"]:
+            continue
+        lat = float(e["Latitud"].replace(",", "."))
+        lon = float(e["Longitud (WGS84)"].replace(",", "."))
+        distancia = haversine(latitud, longitud, lat, lon)
+        if distancia <= radio_km:
+            resultado.append((i, distancia))
+    return resultado
+
+
+def test_en_radio_incluye_estacion_en_el_borde_norte():
+    radio_km = 25
+    latitud = 40.29999 - radio_km / 111.32
+    longitud = -3.7
+    # Estación al norte a 24,99 km, justo dentro del radio
+    estaciones = [_estacion(latitud + degrees(24.99 / RADIO_TIERRA_KM), longitud)]
+    tabla = TablaEstaciones.desde_api(estaciones)
+
+    assert _fuerza_bruta(estaciones, latitud, longitud, radio_km)
+    assert tabla.en_radio(latitud, longitud, radio_km) == _fuerza_bruta(
+        estaciones, latitud, longitud, radio_km
+    )
+
+
+@pytest.mark.parametrize("centro", [(40.4168, -3.7038), (28.1, -15.4), (43.36, -8.41), (69.6, 18.9)])
+@pytest.mark.parametrize("radio_km", [1, 5, 25, 100])
+def test_en_radio_coincide_con_fuerza_bruta(centro, radio_km):
+    aleatorio = random.Random(f"{centro}{radio_km}")
+    latitud, longitud = centro
+    # Estaciones concentradas alrededor del borde del radio, y algunas sin coordenadas
+    grados = 2 * radio_km / 111
+    estaciones = [
+        _estacion(
+            round(latitud + aleatorio.uniform(-grados, grados), 6),
+            round(longitud + aleatorio.uniform(-grados, grados) * 3, 6),
+        )
+        for _ in range(2000)
+    ]
+    estaciones.append(_estacion(None, None))
+    tabla = TablaEstaciones.desde_api(estaciones)
+
+    esperado = _fuerza_bruta(estaciones, latitud, longitud, radio_km)
+    assert esperado
+    assert tabla.en_radio(latitud, longitud, radio_km) == esperado
+
+
+def test_a_bytes_y_desde_bytes_conservan_la_tabla():
+    estaciones = [
+        _estacion(40.41, -3.70, "1,459", "REPSOL", "MADRID"),
+        _estacion(41.38, 2.17, "", "CEPSA", "BARCELONA"),
+        _estacion(None, None, "1,399", "ÁREA ÑANDÚ", "ALCALÁ DE HENARES"),
+    ]
+    tabla = TablaEstaciones.desde_api(estaciones)
+    copia = TablaEstaciones.desde_bytes(tabla.a_bytes())
+
+    assert len(copia) == len(tabla)
+    assert copia.nombres == tabla.nombres
+    assert copia.direcciones == tabla.direcciones
+    assert copia.localidades == tabla.localidades
+    assert copia.provincias == tabla.provincias == ["MADRID"] * 3
+    # NaN != NaN: se comparan los bytes de las columnas numéricas
+    assert copia.latitudes.tobytes() == tabla.latitudes.tobytes()
+    assert copia.longitudes.tobytes() == tabla.longitudes.tobytes()
+    for campo in CAMPOS_PRECIO:
+        assert copia.precios[campo].tobytes() == tabla.precios[campo].tobytes()
+    assert [c.tobytes() for c in copia.indice.columnas()] == [
+        c.tobytes() for c in tabla.indice.columnas()
+    ]
+    assert copia.estacion(1, "Precio Gasolina 95 E5")["precio"] is None
+    assert copia.en_radio(40.4, -3.7, 10) == tabla.en_radio(40.4, -3.7, 10)
+
+
+def test_desde_bytes_rechaza_otro_formato():
+    with pytest.raises(ValueError):
+        TablaEstaciones.desde_bytes(b"XXXX" + bytes(200))
+
+
+def test_tabla_vacia():
+    tabla = TablaEstaciones.desde_api([])
+    copia = TablaEstaciones.desde_bytes(tabla.a_bytes())
+
+    assert len(copia) == 0
+    assert copia.en_radio(40.4, -3.7, 25) == []
+
+
+def test_separador_en_un_texto_no_desplaza_las_filas():
+    estaciones = [
+        _estacion(40.41, -3.70, "1,459", "REP\0SOL", "MADRID"),
+        _estacion(41.38, 2.17, "1,399", "CEPSA", "BARCELONA"),
+    ]
+    copia = TablaEstaciones.desde_bytes(TablaEstaciones.desde_api(estaciones).a_bytes())
+
+    assert copia.nombres == ["REPSOL", "CEPSA"]
+    assert copia.estacion(1, "Precio Gasolina 95 E5")["localidad"] == "BARCELONA"
+
+
+def test_desde_bytes_rechaza_columnas_con_otro_numero_de_filas():
+    tabla = TablaEstaciones.desde_api([_estacion(40.41, -3.70), _estacion(41.38, 2.17)])
+    tabla.direcciones.append("SOBRANTE")
+
+    with pytest.raises(ValueError, match="direcciones"):
+        TablaEstaciones.desde_bytes(tabla.a_bytes())
+
+
+@pytest.mark.parametrize("recorte", [1, 8, 100])
+def test_desde_bytes_rechaza_bloque_truncado(recorte):
+    datos = TablaEstaciones.desde_api([_estacion(40.41, -3.70), _estacion(41.38, 2.17)]).a_bytes()
+
+    with pytest.raises(ValueError):
+        TablaEstaciones.desde_bytes(datos[:-recorte])
@@ -0,0 +1,146 @@
+"""Pruebas del planificador de refrescos según la cadencia de publicación."""
+
+from datetime import datetime, timedelta, timezone
+
+from custom_components.geoportal_gasolineras.const import (
+    DESFASE_MAXIMO,
+    ESPERA_MINIMA_SONDEO,
+    MARGEN_PUBLICACION,
+    PERIODO_PUBLICACION_INICIAL,
+    PERIODO_PUBLICACION_MAXIMO,
+    PERIODO_PUBLICACION_MINIMO,
+    SONDEOS_FALLIDOS_MAXIMOS,
+)
+from custom_components.geoportal_gasolineras.planificador import (
+    ZONA_MINISTERIO,
+    PlanificadorPublicacion,
+    parsear_fecha,
+)
+
+INICIO = datetime(2026, 10, 19, 8, 0, tzinfo=timezone.utc)
+
+
+def _planificador_con_publicaciones(periodo: timedelta, numero: int = 4) -> PlanificadorPublicacion:
+    """Planificador que ha descargado ``numero`` publicaciones separadas por ``periodo``."""
+    planificador = PlanificadorPublicacion("entrada")
+    for i in range(numero):
+        publicacion = INICIO + i * periodo
+        assert planificador.registrar(publicacion, publicacion + timedelta(minutes=1))
+    return planificador
+
+
+def test_parsear_fecha():
+    assert parsear_fecha("19/10/2026 10:30:00") == datetime(2026, 10, 19, 10, 30, tzinfo=ZONA_MINISTERIO)
+    assert parsear_fecha(None) is None
+    assert parsear_fecha("") is None
+    assert parsear_fecha("2026-10-19T10:30:00") is None
+
+
+def test_periodo_inicial_sin_publicaciones():
+    assert PlanificadorPublicacion("entrada").periodo == PERIODO_PUBLICACION_INICIAL
+
+
+def test_periodo_aprendido_es_la_mediana_de_los_intervalos():
+    planificador = _planificador_con_publicaciones(timedelta(minutes=30))
+    # Un intervalo anómalo no mueve la mediana
+    planificador.registrar(INICIO + timedelta(hours=5), INICIO + timedelta(hours=5))
+    assert planificador.periodo == timedelta(minutes=30)
+
+
+def test_periodo_aprendido_se_limita():
+    assert _planificador_con_publicaciones(timedelta(minutes=1)).periodo == PERIODO_PUBLICACION_MINIMO
+    assert _planificador_con_publicaciones(timedelta(days=3)).periodo == PERIODO_PUBLICACION_MAXIMO
+
+
+def test_publicacion_repetida_no_es_nueva():
+    planificador = _planificador_con_publicaciones(timedelta(minutes=30))
+    ultima = planificador.ultima_publicacion
+
+    assert not planificador.registrar(ultima, ultima + timedelta(hours=1))
+    assert planificador.sin_cambios == 1
+    assert planificador.periodo == timedelta(minutes=30)
+
+
+def test_sondeo_tras_la_publicacion_esperada():
+    planificador = _planificador_con_publicaciones(timedelta(minutes=30))
+    ultima = planificador.ultima_publicacion
+
+    esperado = ultima + timedelta(minutes=30) + MARGEN_PUBLICACION + planificador.desfase
+    assert planificador.proximo_sondeo(ultima + timedelta(minutes=1)) == esperado
+
+
+def test_espera_exponencial_sin_datos_nuevos():
+    planificador = _planificador_con_publicaciones(timedelta(hours=1))
+    ahora = planificador.ultima_publicacion + timedelta(hours=2)
+
+    esperas = []
+    for _ in range(6):
+        assert not planificador.registrar_sondeo(planificador.ultima_publicacion, ahora)
+        esperas.append(planificador.proximo_sondeo(ahora) - ahora - planificador.desfase)
+
+    assert esperas[:3] == [ESPERA_MINIMA_SONDEO * 2, ESPERA_MINIMA_SONDEO * 4, ESPERA_MINIMA_SONDEO * 8]
+    # Nunca se espera más que el periodo estimado
+    assert max(esperas) == timedelta(hours=1)
+
+
+def test_publicacion_nueva_reinicia_la_espera():
+    planificador = _planificador_con_publicaciones(timedelta(hours=1))
+    ahora = planificador.ultima_publicacion + timedelta(hours=2)
+    planificador.registrar_sondeo(planificador.ultima_publicacion, ahora)
+
+    nueva = planificador.ultima_publicacion + timedelta(hours=1)
+    assert planificador.registrar_sondeo(nueva, ahora)
+    planificador.registrar(nueva, ahora)
+    assert planificador.sin_cambios == 0
+
+
+def test_desfase_estable_por_entrada_y_acotado():
+    desfases = [PlanificadorPublicacion(f"entrada_{i}").desfase for i in range(50)]
+
+    assert all(timedelta(0) <= d <= DESFASE_MAXIMO for d in desfases)
+    assert len(set(desfases)) > 1
+    assert PlanificadorPublicacion("entrada_7").desfase == desfases[7]
+
+
+def test_fecha_ilegible_fuerza_descarga_en_cada_sondeo():
+    planificador = PlanificadorPublicacion("entrada")
+    planificador.registrar(parsear_fecha("19/10/2026 10:30"), INICIO)
+
+    assert planificador.ultima_publicacion is None
+    assert planificador.registrar_sondeo(parsear_fecha("sin fecha"), INICIO + timedelta(hours=1))
+
+
+def test_sondeos_fallidos_fuerzan_descarga():
+    planificador = _planificador_con_publicaciones(timedelta(hours=1))
+    ahora = planificador.ultima_publicacion + timedelta(minutes=5)
+
+    for _ in range(SONDEOS_FALLIDOS_MAXIMOS - 1):
+        assert not planificador.registrar_sondeo(None, ahora)
+    assert planificador.registrar_sondeo(None, ahora)
+
+    # Una descarga correcta reinicia la cuenta
+    planificador.registrar(None, ahora)
+    assert planificador.sondeos_fallidos == 0
+    assert not planificador.registrar_sondeo(planificador.ultima_publicacion, ahora)
+
+
+def test_datos_caducados_fuerzan_descarga():
+    planificador = _planificador_con_publicaciones(timedelta(hours=1))
+    descarga = planificador.ultima_descarga
+
+    assert not planificador.registrar_sondeo(planificador.ultima_publicacion, descarga + timedelta(hours=1))
+    assert planificador.registrar_sondeo(
+        planificador.ultima_publicacion, descarga + PERIODO_PUBLICACION_MAXIMO
+    )
+
+
+def test_proximo_sondeo_no_pasa_de_la_caducidad():
+    planificador = _planificador_con_publicaciones(timedelta(days=3))
+    descarga = planificador.ultima_descarga
+
+    limite = descarga + PERIODO_PUBLICACION_MAXIMO + planificador.desfase
+    assert planificador.proximo_sondeo(descarga) <= limite
+    # Ya caducados, se sigue la espera exponencial en lugar de sondear en bucle
+    ahora = limite + timedelta(minutes=1)
+    planificador.sin_cambio()
+    assert planificador.proximo_sondeo(ahora) > ahora